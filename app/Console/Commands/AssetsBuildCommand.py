@@ -0,0 +1,29 @@
+# app/Console/Commands/AssetsBuildCommand.py
+from typing import List, Optional
+from app.Console.Commands.Command import Command
+from app.Services.AssetService import AssetService, BUILD_DIR, brotli
+
+
+class AssetsBuildCommand(Command):
+    @property
+    def signature(self) -> str:
+        return "assets:build"
+
+    @property
+    def description(self) -> str:
+        return "Собрать статику: копии с хешем в имени, .gz/.br-варианты и manifest.json"
+
+    def handle(self, args: Optional[List[str]] = None) -> int:
+        try:
+            stats = AssetService.build()
+        except Exception as e:
+            self.print_error(f"Ошибка сборки статики: {str(e)}")
+            return 1
+
+        self.print_info(
+            f"Собрано файлов: {stats['files']} ({stats['bytes'] / 1024 / 1024:.1f} МБ) в {BUILD_DIR}, "
+            f"сжатых вариантов: {stats['compressed']}"
+        )
+        if brotli is None:
+            self.print_info("Пакет brotli не установлен: созданы только .gz-варианты")
+        return 0
@@ -0,0 +1,57 @@
+# app/Console/Commands/MailCampaignCommand.py
+from typing import Dict, List, Optional
+from app.Console.Commands.Command import Command
+
+
+class MailCampaignCommand(Command):
+    @property
+    def signature(self) -> str:
+        return "mail:campaign {name} {template} {--subject=} {--rate=} {--concurrency=} {--chunk=} {--fresh}"
+
+    @property
+    def description(self) -> str:
+        return "Рассылка письма по шаблону всем пользователям (с продолжением после сбоя)"
+
+    def handle(self, args: Optional[List[str]] = None) -> int:
+        positional = [arg for arg in (args or []) if not arg.startswith("--")]
+        if len(positional) < 2:
+            self.print_error("Укажите имя кампании и шаблон, например: mail:campaign news mail/campaigns/announcement.html")
+            return 1
+
+        name, template = positional[0], positional[1]
+        options = self._options(args or [])
+
+        try:
+            # Импорт здесь: сервис подключается к БД, а craft загружает все команды
+            from app.Services.MailCampaignService import MailCampaign
+
+            campaign = MailCampaign(
+                name=name,
+                template=template,
+                subject=options.get("subject", name),
+                rate=float(options.get("rate", 0)),
+                concurrency=int(options.get("concurrency", 4)),
+                chunk_size=int(options.get("chunk", 500))
+            )
+            if "fresh" in options:
+                campaign.reset()
+
+            checkpoint = campaign.load_checkpoint()
+            if checkpoint["last_id"]:
+                self.print_info(f"Продолжаю кампанию {name} с id > {checkpoint['last_id']}")
+
+            result = campaign.run()
+            self.print_info(f"Кампания {name} завершена: отправлено {result['sent']}, ошибок {result['failed']}")
+            return 0 if not result["failed"] else 2
+        except Exception as e:
+            self.print_error(f"Ошибка: {str(e)}")
+            return 1
+
+    @staticmethod
+    def _options(args: List[str]) -> Dict[str, str]:
+        options = {}
+        for arg in args:
+            if arg.startswith("--"):
+                key, _, value = arg[2:].partition("=")
+                options[key] = value
+        return options
@@ -0,0 +1,41 @@
+# app/Console/Commands/TemplatesCompileCommand.py
+import time
+from typing import List, Optional
+from app.Console.Commands.Command import Command
+
+
+class TemplatesCompileCommand(Command):
+    @property
+    def signature(self) -> str:
+        return "templates:compile {--clear}"
+
+    @property
+    def description(self) -> str:
+        return "Скомпилировать все шаблоны app/Views в кеш байткода storage/framework/templates"
+
+    def handle(self, args: Optional[List[str]] = None) -> int:
+        from config.templates import TEMPLATES_CACHE_DIR, streaming_templates, templates
+
+        # Синхронное окружение и асинхронное (для StreamingTemplateResponse) кешируются раздельно
+        environments = [templates.env, streaming_templates.env]
+        if "--clear" in (args or []):
+            for env in environments:
+                env.bytecode_cache.clear()
+
+        compiled, failed = 0, 0
+        started = time.perf_counter()
+        for env in environments:
+            for name in env.list_templates(extensions=["html"]):
+                try:
+                    # get_template компилирует шаблон и записывает байткод в кеш
+                    env.get_template(name)
+                    compiled += 1
+                except Exception as e:
+                    self.print_error(f"{name}: {str(e)}")
+                    failed += 1
+
+        self.print_info(
+            f"Скомпилировано шаблонов: {compiled} за {(time.perf_counter() - started) * 1000:.0f} мс "
+            f"в {TEMPLATES_CACHE_DIR}"
+        )
+        return 1 if failed else 0
@@ -6,6 +6,9 @@ from app.Console.Commands.MakeModelCommand import MakeModelCommand
 from app.Console.Commands.MigrateCommand import MigrateCommand
 from app.Console.Commands.MakeMigrationCommand import MakeMigrationCommand
 from app.Console.Commands.SeedCommand import SeedCommand
+from app.Console.Commands.MailCampaignCommand import MailCampaignCommand
+from app.Console.Commands.AssetsBuildCommand import AssetsBuildCommand
+from app.Console.Commands.TemplatesCompileCommand import TemplatesCompileCommand
 
 class Kernel:
     def __init__(self):
@@ -18,6 +21,9 @@ class Kernel:
             'migrate': MigrateCommand,
             'make:migration': MakeMigrationCommand,
             'db:seed': SeedCommand,
+            'mail:campaign': MailCampaignCommand,
+            'assets:build': AssetsBuildCommand,
+            'templates:compile': TemplatesCompileCommand,
         }
     
     def run(self, command: str, args: Optional[List[str]] = None) -> int:
@@ -2,19 +2,22 @@
 # app/Controllers/Auth/LoginController.py
 
 from fastapi import Request, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from config.templates import templates
 from app.Models.User import User
-from sqlalchemy.orm import Session
-from config.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_db
 from typing import AsyncGenerator
-from app.Services.RequestParser import RequestParser
-from email_validator import validate_email, EmailNotValidError
-import re
+from app.Services.RequestParser import RequestParser, RequestParseError
+from app.Services.JsonService import FastJSONResponse
+from app.Requests.LoginRequest import LoginRequest
+from app.Services.ValidationService import ValidationService
+from config.app import settings
 import logging
 from app.Services.CsrfService import CsrfService
+from app.Services.PageShellCache import PageShellCache
 from app.Services.AuthService import AuthService
-from app.Services.RateLimitService import RateLimitService
 
 logger = logging.getLogger(__name__)
 
@@ -22,62 +25,46 @@ class LoginController:
     
     @staticmethod
     async def login(request: Request) -> HTMLResponse:
-     
-        csrf_token = CsrfService.set_token_to_session(request)
-        return templates.TemplateResponse("auth/auth.html", {
-            "request": request,
-            "csrf_token": csrf_token
-        })
+        return PageShellCache.response(request, "auth/auth.html")
     
 
     @staticmethod
-    async def authLogin(request: Request, db: Session = Depends(get_db)):
+    async def authLogin(request: Request, db: AsyncSession = Depends(get_async_db)):
         try:
             
             
-            request_data = await RequestParser.parse_request(request)
-            csrf_token = request_data.get("csrf_token")
-            email = request_data.get("login")
-            password = request_data.get("password")
-
-            client_ip = request.client.host if request.client else "unknown"
-            rate_key = f"login:{client_ip}"
-            if not RateLimitService.check_and_increment(rate_key, limit=5, window_seconds=300):
-                return JSONResponse(
-                    {"error": "Слишком много попыток, попробуйте позже", "csrf": CsrfService.set_token_to_session(request)},
-                    status_code=429
-                )
+            payload = await RequestParser.parse(request, LoginRequest)
+            csrf_token = payload.csrf_token
+            email = payload.login
+            password = payload.password
 
             if not CsrfService.validate_token(request, csrf_token):
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Некорректный CSRF-токен", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )            
 
             if not email:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
             if not password:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите пароль", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
-            try:
-                valid = validate_email(email)
-                email = valid.email 
-            except EmailNotValidError as e:
-                return JSONResponse(
+            email = await ValidationService.normalize_email(email, check_deliverability=settings.email_check_deliverability_hot_paths)
+            if email is None:
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите корректный email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
-            password_pattern = re.compile(r"(?=^.{10,72}$)(?=.*[A-Z])(?=.*[0-9])(?=.*[a-z])(?=.*[^\w\s]).*")
-            if not password_pattern.fullmatch(password):
-                return JSONResponse(
+            if not ValidationService.is_valid_password(password):
+                return FastJSONResponse(
                     {
                         "error": "Пароль должен содержать:\n"
                         "- Не менее 10 символов\n"
@@ -91,19 +78,24 @@ class LoginController:
 
             # Удалено лишнее хеширование пароля - проверка происходит через verify_password
             
-            user = db.query(User).filter_by(
-                email=email,
-            ).first()
+            user = (await db.execute(
+                select(User).filter_by(email=email)
+            )).scalars().first()
 
-            user_verify = user and AuthService.verify_password(password, user.password)
+            # Соединение возвращается в пул до проверки bcrypt
+            await db.release()
+
+            user_verify = user and await AuthService.verify_password_async(password, user.password)
             
             if not user_verify:
                 # Единое сообщение, чтобы не раскрывать наличие пользователя
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Неверные учетные данные", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=401
                 )
             
+            # Новый id сессии после входа (защита от фиксации сессии)
+            request.session.regenerate()
             request.session["user_id"] = user.id
             request.session["user_name"] = user.name
             request.session["user_email"] = user.email
@@ -111,14 +103,19 @@ class LoginController:
             # Генерируем новый токен после успешной аутентификации
             new_csrf_token = CsrfService.set_token_to_session(request)
             
-            return JSONResponse(
+            return FastJSONResponse(
                 {"result": 1, "url": "/main", "csrf": new_csrf_token}
             )
             
+        except RequestParseError as e:
+            return FastJSONResponse(
+                {"error": e.message, "csrf": CsrfService.set_token_to_session(request)},
+                status_code=e.status_code
+            )
         except Exception as e:
             # Логируем детали ошибки на сервере, но не раскрываем клиенту
             logger.error(f"Login error: {str(e)}", exc_info=True)
-            return JSONResponse(
+            return FastJSONResponse(
                 {"error": "Произошла ошибка при обработке запроса", "csrf": CsrfService.generate_token()},
                 status_code=500
             )
@@ -1,15 +1,18 @@
 # app/Controllers/Auth/RegisterController.py      
 from fastapi import Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from config.templates import templates
 from app.Models.User import User
-from sqlalchemy.orm import Session
-from config.database import get_db
-from app.Services.RequestParser import RequestParser
-from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_db
+from app.Services.RequestParser import RequestParser, RequestParseError
+from app.Services.JsonService import FastJSONResponse
+from app.Requests.RegisterRequest import RegisterRequest
+from app.Services.ValidationService import ValidationService
 from app.Services.CsrfService import CsrfService
+from app.Services.PageShellCache import PageShellCache
 from app.Services.EmailService import EmailService
-import re
 import logging
 from datetime import datetime
 from app.Services.AuthService import AuthService
@@ -20,32 +23,27 @@ class RegisterController():
     
     @staticmethod
     async def register(request: Request) -> HTMLResponse:
-     
-        csrf_token = CsrfService.set_token_to_session(request)
-        return templates.TemplateResponse("auth/auth.html", {
-            "request": request,
-            "csrf_token": csrf_token
-        }) 
+        return PageShellCache.response(request, "auth/auth.html")
 
     @staticmethod
-    async def siteRegister(request: Request, db: Session = Depends(get_db)):
+    async def siteRegister(request: Request, db: AsyncSession = Depends(get_async_db)):
         try:
-            request_data = await RequestParser.parse_request(request)
+            payload = await RequestParser.parse(request, RegisterRequest)
 
-            token = request_data.get("token")
-            csrf_token = request_data.get("csrf_token")
-            name = request_data.get("name")
-            email = request_data.get("email")
-            password = request_data.get("password")
+            token = payload.token
+            csrf_token = payload.csrf_token
+            name = payload.name
+            email = payload.email
+            password = payload.password
 
             if not CsrfService.validate_token(request, csrf_token):
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Некорректный CSRF-токен", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
             if not name:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите имя", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
@@ -53,42 +51,38 @@ class RegisterController():
             # Валидация имени на сервере
             name = name.strip()
             if len(name) < 2 or len(name) > 255:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Имя должно содержать от 2 до 255 символов", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
-            name_pattern = re.compile(r"^[a-zA-Zа-яА-ЯёЁ\s\-]+$")
-            if not name_pattern.match(name):
-                return JSONResponse(
+            if not ValidationService.is_valid_name(name):
+                return FastJSONResponse(
                     {"error": "Имя содержит недопустимые символы", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
             if not email:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             if not password:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите пароль", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
-            try:
-                valid = validate_email(email)
-                email = valid.email 
-            except EmailNotValidError as e:
-                return JSONResponse(
+            email = await ValidationService.normalize_email(email, check_deliverability=True)
+            if email is None:
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите корректный email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
             # Валидация пароля ПЕРЕД проверкой существования пользователя (защита от timing attack)
-            password_pattern = re.compile(r"(?=^.{10,72}$)(?=.*[A-Z])(?=.*[0-9])(?=.*[a-z])(?=.*[^\w\s]).*")
-            if not password_pattern.fullmatch(password):
-                return JSONResponse(
+            if not ValidationService.is_valid_password(password):
+                return FastJSONResponse(
                     {
                         "error": "Пароль должен содержать:\n"
                         "- Не менее 10 символов\n"
@@ -101,17 +95,20 @@ class RegisterController():
                 )
             
             # Проверка существования пользователя после валидации
-            user = db.query(User).filter_by(
-                email=email
-            ).first()
+            user = (await db.execute(
+                select(User).filter_by(email=email)
+            )).scalars().first()
             
             if user:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Ошибка пользователя с указанным E-mail.", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=409
                 )
 
-            password_hash = AuthService.get_password_hash(password)
+            # Соединение не удерживается на время хеширования; вставка откроет новую транзакцию
+            await db.release()
+
+            password_hash = await AuthService.hash_password_async(password)
             
             # Использование транзакции для согласованности данных
             try:
@@ -124,7 +121,7 @@ class RegisterController():
                 )
                 
                 db.add(new_user)
-                db.flush()  # Получаем ID без commit
+                await db.flush()  # Получаем ID без commit
                 
                 from app.Models.UsersPasswordHistory import UsersPasswordHistory
                 password_history = UsersPasswordHistory(
@@ -134,21 +131,30 @@ class RegisterController():
                     updated_at=datetime.utcnow()
                 )
                 db.add(password_history)
-                db.commit()  # Один commit для обеих операций
+                await db.commit()  # Один commit для обеих операций
+
+                # Приветственное письмо уходит в фоне и не влияет на результат регистрации
+                if not EmailService.queue_welcome_email(email, name):
+                    logger.warning(f"Welcome email to {email} was not accepted for delivery")
                 
-                return JSONResponse(
+                return FastJSONResponse(
                     {"result": 1, "csrf": CsrfService.set_token_to_session(request)},
                     status_code=200
                 )
             except Exception as e:
-                db.rollback()
+                await db.rollback()
                 raise
 
                         
+        except RequestParseError as e:
+            return FastJSONResponse(
+                {"error": e.message, "csrf": CsrfService.set_token_to_session(request)},
+                status_code=e.status_code
+            )
         except Exception as e:
             # Логируем детали ошибки на сервере, но не раскрываем клиенту
             logger.error(f"Registration error: {str(e)}", exc_info=True)
-            return JSONResponse(
+            return FastJSONResponse(
                 {"error": "Произошла ошибка при обработке запроса", "csrf": CsrfService.generate_token()},
                 status_code=500
             )          
\ No newline at end of file
@@ -1,20 +1,23 @@
 # app/Controllers/Auth/ResetPasswordController.py   
 from fastapi import Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from config.templates import templates
 from app.Models.User import User
 from app.Models.UsersPasswordResetToken import UsersPasswordResetToken
 from app.Models.UsersPasswordHistory import UsersPasswordHistory
-from sqlalchemy.orm import Session
-from config.database import get_db
-from app.Services.RequestParser import RequestParser
-from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_db
+from config.app import settings
+from app.Services.RequestParser import RequestParser, RequestParseError
+from app.Services.JsonService import FastJSONResponse
+from app.Requests.ResetPasswordRequest import ResetPasswordRequest
+from app.Services.ValidationService import ValidationService
 from app.Services.CsrfService import CsrfService
+from app.Services.PageShellCache import PageShellCache
 from app.Services.EmailService import EmailService
 from app.Services.AuthService import AuthService
-from app.Services.RateLimitService import RateLimitService
 import hashlib
-import re
 import logging
 from datetime import datetime
 
@@ -23,15 +26,15 @@ logger = logging.getLogger(__name__)
 class ResetPasswordController():
     
     @classmethod
-    async def resetPassword(cls, request: Request, token: str, db: Session = Depends(get_db)):
+    async def resetPassword(cls, request: Request, token: str, db: AsyncSession = Depends(get_async_db)):
         try:
             if not token:
                 raise HTTPException(status_code=302, headers={"Location": "/"})
 
             token_hash = hashlib.sha256(token.encode()).hexdigest()
-            reset_token = db.query(UsersPasswordResetToken).filter(
-                UsersPasswordResetToken.token == token_hash
-            ).first()
+            reset_token = (await db.execute(
+                select(UsersPasswordResetToken).where(UsersPasswordResetToken.token == token_hash)
+            )).scalars().first()
 
             if not reset_token:
                 raise HTTPException(status_code=302, headers={"Location": "/"})
@@ -39,98 +42,83 @@ class ResetPasswordController():
             if reset_token.is_expired():
                 raise HTTPException(status_code=302, headers={"Location": "/"})
 
-            csrf_token = CsrfService.set_token_to_session(request)
-            return templates.TemplateResponse("auth/auth.html", {
-                "request": request,
-                "csrf_token": csrf_token
-            })
+            return PageShellCache.response(request, "auth/auth.html")
         except Exception as e:
             raise HTTPException(status_code=302, headers={"Location": "/"})
     
     @staticmethod
-    async def passwordСhange(request: Request, db: Session = Depends(get_db)):
+    async def passwordСhange(request: Request, db: AsyncSession = Depends(get_async_db)):
         try:
-            request_data = await RequestParser.parse_request(request)
-            token = request_data.get("token")
-            csrf_token = request_data.get("csrf_token")
-            email = request_data.get("email")
-            password = request_data.get("password")
-
-            client_ip = request.client.host if request.client else "unknown"
-            rate_key = f"password_change:{client_ip}"
-            if not RateLimitService.check_and_increment(rate_key, limit=5, window_seconds=900):
-                return JSONResponse(
-                    {"error": "Слишком много попыток, попробуйте позже", "csrf": CsrfService.set_token_to_session(request)},
-                    status_code=429
-                )
+            payload = await RequestParser.parse(request, ResetPasswordRequest)
+            token = payload.token
+            csrf_token = payload.csrf_token
+            email = payload.email
+            password = payload.password
             
             if not token:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Отсутствует токен сброса", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
             if not CsrfService.validate_token(request, csrf_token):
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Некорректный CSRF-токен", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )  
 
             if not email:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             if not password:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите пароль", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
 
-            try:
-                valid = validate_email(email)
-                email = valid.email 
-            except EmailNotValidError as e:
-                return JSONResponse(
+            email = await ValidationService.normalize_email(email, check_deliverability=settings.email_check_deliverability_hot_paths)
+            if email is None:
+                return FastJSONResponse(
                     {"error": "Пожалуйста, введите корректный email", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
             token_hash = hashlib.sha256(token.encode()).hexdigest()
-            reset_token = db.query(UsersPasswordResetToken).filter(
-                UsersPasswordResetToken.token == token_hash
-            ).first()
+            reset_token = (await db.execute(
+                select(UsersPasswordResetToken).where(UsersPasswordResetToken.token == token_hash)
+            )).scalars().first()
             
             if not reset_token or reset_token.email != email:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Некорректный или устаревший токен сброса", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=401
                 )
             
             if reset_token.is_expired():
-                db.query(UsersPasswordResetToken).filter(
-                    UsersPasswordResetToken.token == token_hash
-                ).delete()
-                db.commit()
-                return JSONResponse(
+                await db.execute(
+                    delete(UsersPasswordResetToken).where(UsersPasswordResetToken.token == token_hash)
+                )
+                await db.commit()
+                return FastJSONResponse(
                     {"error": "Срок действия токена истек", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
-            user = db.query(User).filter_by(
-                email=email
-            ).first()
+            user = (await db.execute(
+                select(User).filter_by(email=email)
+            )).scalars().first()
             
             # Защита от перечисления пользователей - используем общее сообщение
             if not user:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Некорректный или устаревший токен сброса", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=401
                 )
             
-            password_pattern = re.compile(r"(?=^.{10,72}$)(?=.*[A-Z])(?=.*[0-9])(?=.*[a-z])(?=.*[^\w\s]).*")
-            if not password_pattern.fullmatch(password):
-                return JSONResponse(
+            if not ValidationService.is_valid_password(password):
+                return FastJSONResponse(
                     {
                         "error": "Пароль должен содержать:\n"
                         "- Не менее 10 символов\n"
@@ -142,38 +130,40 @@ class ResetPasswordController():
                     status_code=400
                 )
             
-            password_hash = AuthService.get_password_hash(password)
-            
-            # Проверяем, использовался ли пароль ранее
-            password_reused = False
-            password_history_entries = db.query(UsersPasswordHistory).filter(
-                UsersPasswordHistory.user_id == user.id
-            ).all()
-
-            if AuthService.verify_password(password, user.password):
-                password_reused = True
-            else:
-                for history_record in password_history_entries:
-                    if AuthService.verify_password(password, history_record.password):
-                        password_reused = True
-                        break
+            # Проверяем, использовался ли пароль ранее (только последние history_depth записей)
+            history_depth = max(settings.password_history_depth, 1)
+            password_history_entries = (await db.execute(
+                select(UsersPasswordHistory.password).where(
+                    UsersPasswordHistory.user_id == user.id
+                ).order_by(
+                    UsersPasswordHistory.id.desc()
+                ).limit(history_depth)
+            )).scalars().all()
+
+            # Соединение не удерживается на время проверок bcrypt; запись откроет новую транзакцию
+            await db.release()
+
+            password_reused = await AuthService.verify_password_any_async(
+                password,
+                [user.password, *password_history_entries]
+            )
 
             if password_reused:
-                return JSONResponse(
+                return FastJSONResponse(
                     {"error": "Нельзя использовать старый пароль. Придумайте новый пароль.", "csrf": CsrfService.set_token_to_session(request)},
                     status_code=400
                 )
             
+            password_hash = await AuthService.hash_password_async(password)
+
             # Использование транзакции для согласованности данных
             try:
-                db.query(UsersPasswordResetToken).filter(
-                    UsersPasswordResetToken.email == email
-                ).delete()
-
-                db.query(User).filter(
-                    User.email == email
-                ).update(
-                    {"password": password_hash}
+                await db.execute(
+                    delete(UsersPasswordResetToken).where(UsersPasswordResetToken.email == email)
+                )
+
+                await db.execute(
+                    update(User).where(User.email == email).values(password=password_hash)
                 )
                 
                 password_history = UsersPasswordHistory(
@@ -183,22 +173,43 @@ class ResetPasswordController():
                     updated_at=datetime.utcnow()
                 )
                 db.add(password_history)
+                await db.flush()
+
+                # Удаляем историю глубже history_depth в той же транзакции
+                keep_ids = (await db.execute(
+                    select(UsersPasswordHistory.id).where(
+                        UsersPasswordHistory.user_id == user.id
+                    ).order_by(
+                        UsersPasswordHistory.id.desc()
+                    ).limit(history_depth)
+                )).scalars().all()
+                await db.execute(
+                    delete(UsersPasswordHistory).where(
+                        UsersPasswordHistory.user_id == user.id,
+                        UsersPasswordHistory.id.notin_(keep_ids)
+                    ).execution_options(synchronize_session=False)
+                )
                 
-                db.commit()
+                await db.commit()
                 
-                return JSONResponse(
+                return FastJSONResponse(
                     {"result": 1},
                     status_code=200
                 )
             except Exception as e:
-                db.rollback()
+                await db.rollback()
                 raise  
 
                         
+        except RequestParseError as e:
+            return FastJSONResponse(
+                {"error": e.message, "csrf": CsrfService.set_token_to_session(request)},
+                status_code=e.status_code
+            )
         except Exception as e:
             # Логируем детали ошибки на сервере, но не раскрываем клиенту
             logger.error(f"Password reset error: {str(e)}", exc_info=True)
-            return JSONResponse(
+            return FastJSONResponse(
                 {"error": "Произошла ошибка при обработке запроса", "csrf": CsrfService.generate_token()},
                 status_code=500
             )
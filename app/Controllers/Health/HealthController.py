@@ -0,0 +1,9 @@
+# app/Controllers/Health/HealthController.py
+
+from app.Services.JsonService import FastJSONResponse
+
+class HealthController:
+    @staticmethod
+    async def health() -> FastJSONResponse:
+        # Liveness-проверка: без сессии, БД и шаблонов (путь в route.stateless_paths)
+        return FastJSONResponse({"status": "ok"})
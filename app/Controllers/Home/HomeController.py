@@ -1,15 +1,14 @@
 # app/Controllers/Home/HomeController.py
 
 from fastapi import Request
-from fastapi.responses import HTMLResponse
-from config.templates import templates
+from app.Services.StreamingTemplateResponse import StreamingTemplateResponse
 
 class HomeController:
     @staticmethod
-    async def index(request: Request) -> HTMLResponse:
+    async def index(request: Request) -> StreamingTemplateResponse:
         user_name = request.session.get("user_name","Гость")
 
-        return templates.TemplateResponse("home/index.html", {
+        return StreamingTemplateResponse("home/index.html", {
                 "request": request,
                 "user_name": user_name
             })
@@ -1,14 +1,13 @@
 # app/Controllers/Main/MainController.py
 
 from fastapi import Request
-from fastapi.responses import HTMLResponse
-from config.templates import templates
+from app.Services.StreamingTemplateResponse import StreamingTemplateResponse
 
 class MainController:
     @staticmethod
-    async def main(request: Request) -> HTMLResponse:
+    async def main(request: Request) -> StreamingTemplateResponse:
         user_name = request.session.get("user_name","Гость")
-        return templates.TemplateResponse(
+        return StreamingTemplateResponse(
             "main/index.html", 
             {
                 "request": request,
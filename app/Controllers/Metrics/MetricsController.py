@@ -0,0 +1,19 @@
+# app/Controllers/Metrics/MetricsController.py
+
+import asyncio
+import hmac
+from fastapi import Request, Response
+from app.Services.MetricsRegistry import CONTENT_TYPE, MetricsRegistry
+from config.app import settings
+
+class MetricsController:
+    @staticmethod
+    async def metrics(request: Request) -> Response:
+        # Без сессии и rate limit (путь в route.stateless_paths); доступ - по metrics_token, если задан
+        if settings.metrics_token:
+            authorization = request.headers.get("authorization", "")
+            if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.metrics_token}".encode()):
+                return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        # Чтение снимков воркеров и обход таблицы rate limit - вне event loop
+        body = await asyncio.to_thread(MetricsRegistry.exposition)
+        return Response(body, media_type=CONTENT_TYPE)
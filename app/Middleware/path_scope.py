@@ -0,0 +1,49 @@
+# app/Middleware/path_scope.py
+from typing import Iterable, Optional, Tuple
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+def _prefixes(paths: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(path.rstrip("/") for path in paths)
+
+
+def _matches(path: str, prefixes: Tuple[str, ...]) -> bool:
+    # Префикс совпадает по границе сегмента: /static и /static/..., но не /statics
+    for prefix in prefixes:
+        if path == prefix or path.startswith(prefix + "/") or not prefix:
+            return True
+    return False
+
+
+class PathScopedMiddleware:
+    """Оборачивает middleware и применяет его только к части путей.
+
+    Запросы к путям из exclude (или вне include, если он задан) передаются
+    приложению напрямую, минуя обернутое middleware:
+
+        app.add_middleware(PathScopedMiddleware, middleware=SessionMiddleware, exclude=["/static"], ...)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        middleware: type,
+        include: Optional[Iterable[str]] = None,
+        exclude: Iterable[str] = (),
+        **options
+    ):
+        self.app = app
+        self.scoped = middleware(app, **options)
+        self.include = _prefixes(include) if include is not None else None
+        self.exclude = _prefixes(exclude)
+
+    def applies_to(self, path: str) -> bool:
+        if self.include is not None and not _matches(path, self.include):
+            return False
+        return not _matches(path, self.exclude)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and not self.applies_to(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        await self.scoped(scope, receive, send)
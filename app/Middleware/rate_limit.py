@@ -0,0 +1,58 @@
+# app/Middleware/rate_limit.py
+from typing import Callable, Iterable, Optional
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.Services.JsonService import FastJSONResponse
+from app.Services.CsrfService import CsrfService
+from app.Services.RateLimitService import RateLimitService
+
+
+def client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimit:
+    """Объявление лимита для маршрута: не более limit запросов за window_seconds на ключ"""
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        limit: int,
+        window_seconds: int,
+        key: Callable[[Scope], str] = client_ip,
+        name: Optional[str] = None
+    ):
+        self.method = method.upper()
+        self.path = path
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.key = key
+        self.name = name or path
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: отвечает 429 до чтения тела запроса и до разрешения зависимостей маршрута"""
+
+    def __init__(self, app: ASGIApp, rules: Iterable[RateLimit]):
+        self.app = app
+        self.rules = {(rule.method, rule.path): rule for rule in rules}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            rule = self.rules.get((scope["method"], scope["path"]))
+            if rule is not None and not RateLimitService.check_and_increment(
+                f"{rule.name}:{rule.key(scope)}", rule.limit, rule.window_seconds
+            ):
+                # До маршрутизации scope["route"] нет: 429 учитывается в метриках на пути правила
+                scope["route_path"] = rule.path
+                request = Request(scope)
+                response = FastJSONResponse(
+                    {"error": "Слишком много попыток, попробуйте позже", "csrf": CsrfService.set_token_to_session(request)},
+                    status_code=429
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,55 @@
+# app/Middleware/server_timing.py
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.Services.TimingService import TimingService
+
+
+def route_name(scope: Scope, root_path: str) -> str:
+    """Шаблон маршрута (/password/reset/{token}), а не фактический путь: число меток ограничено"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Ответ до маршрутизации (429 от RateLimitMiddleware)
+    if "route_path" in scope:
+        return scope["route_path"]
+    # Смонтированное приложение (/static) меняет root_path
+    if scope.get("root_path", "") != root_path:
+        return scope["root_path"]
+    return "unmatched"
+
+
+class ServerTimingMiddleware:
+    """Замер фаз запроса через TimingService: заголовок Server-Timing, гистограммы и статусы ответов по маршрутам.
+
+    Добавляется последним, чтобы сессия и rate limit выполнялись внутри замера.
+    В заголовок попадают фазы до отправки заголовков ответа; для потоковых
+    ответов рендер тела учитывается только в гистограммах.
+    """
+
+    def __init__(self, app: ASGIApp, header: bool = True):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        timings, token = TimingService.start()
+        # Исключение до отправки заголовков ServerErrorMiddleware превратит в 500
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            TimingService.stop(token)
+            TimingService.observe(route_name(scope, root_path), timings, status)
@@ -0,0 +1,161 @@
+# app/Middleware/session.py
+import asyncio
+import random
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.Services.CsrfService import CsrfService
+from app.Services.SessionService import CachedSessionStore, SessionService
+from app.Services.TimingService import TimingService
+
+
+class ServerSession(MutableMapping):
+    """Данные сессии, загруженные middleware до вызова приложения; изменения отмечают сессию как dirty"""
+
+    def __init__(self, session_id: Optional[str], data: Optional[Dict], last_activity: float = 0.0):
+        # Истекшая или неизвестная сессия (data is None): id не переиспользуем
+        self.session_id = session_id if data is not None else None
+        self.previous_id: Optional[str] = None
+        self.modified = False
+        self.last_activity = last_activity
+        self._data: Dict = data if data is not None else {}
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value) -> None:
+        if key not in self._data or self._data[key] != value:
+            self._data[key] = value
+            self.modified = True
+
+    def __delitem__(self, key) -> None:
+        del self._data[key]
+        self.modified = True
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        """Очистка сессии (выход): старая запись удаляется, при следующей записи выдается новый id"""
+        if self.session_id is not None:
+            self.previous_id = self.session_id
+            self.session_id = None
+        self._data = {}
+        self.modified = True
+
+    def regenerate(self) -> None:
+        """Новый id с сохранением данных (после входа, против фиксации сессии).
+
+        CSRF seed и токен сбрасываются: токены, выданные до входа, перестают действовать.
+        """
+        if self.session_id is not None:
+            self.previous_id = self.session_id
+            self.session_id = None
+        self._data.pop(CsrfService.CSRF_SEED_NAME, None)
+        self._data.pop(CsrfService.CSRF_TOKEN_NAME, None)
+        self.modified = True
+
+
+class SessionMiddleware:
+    """Серверные сессии вместо подписанной cookie Starlette.
+
+    Cookie содержит только случайный id без подписи: угадать его не проще,
+    чем подделать HMAC. Сессия с действительным id в cookie загружается
+    сразу, до вызова приложения, в потоке: ленивое чтение при первом
+    обращении выполнялось бы синхронно внутри обработчика, и драйвер
+    database блокировал бы event loop. Хранилище пишется только если
+    данные изменились. Срок жизни скользящий:
+    если сессия не записывалась дольше touch_interval секунд, время
+    активности обновляется без записи данных (touch) и cookie отправляется
+    с новым Max-Age. Пути без сессии (route.stateless_paths) до этого
+    middleware не доходят.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: Optional[CachedSessionStore] = None,
+        session_cookie: str = "session",
+        max_age: int = 60 * 60 * 24 * 7,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        gc_probability: float = 0.01,
+        touch_interval: int = 15 * 60
+    ):
+        self.app = app
+        self.store = store or SessionService.store()
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.gc_probability = gc_probability
+        self.touch_interval = touch_interval
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+        self.path = path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.session_cookie)
+        loaded = None
+        if SessionService.is_valid_id(session_id):
+            # Повторные запросы той же сессии отдаются из LRU после проверки версии
+            with TimingService.measure("session"):
+                loaded = await asyncio.to_thread(self.store.load, session_id)
+        data, last_activity = loaded if loaded is not None else (None, 0.0)
+        session = ServerSession(session_id, data, last_activity)
+        scope["session"] = session
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                cookie = None
+                if session.modified:
+                    with TimingService.measure("session"):
+                        cookie = await self._commit(session)
+                elif session.session_id is not None and time.time() - session.last_activity > self.touch_interval:
+                    with TimingService.measure("session"):
+                        cookie = await self._touch(session)
+                if cookie is not None:
+                    MutableHeaders(scope=message).append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(self, session: ServerSession) -> Optional[str]:
+        """Сохранение изменившейся сессии; возвращает значение Set-Cookie"""
+        if session.previous_id is not None:
+            await asyncio.to_thread(self.store.destroy, session.previous_id)
+
+        if not session._data:
+            if session.session_id is not None:
+                await asyncio.to_thread(self.store.destroy, session.session_id)
+            if session.session_id is None and session.previous_id is None:
+                return None
+            return self._cookie("null", max_age=0)
+
+        if session.session_id is None:
+            session.session_id = SessionService.generate_id()
+        await asyncio.to_thread(self.store.save, session.session_id, session._data)
+
+        if random.random() < self.gc_probability:
+            # Удаление истекших сессий не задерживает ответ
+            asyncio.get_running_loop().run_in_executor(None, self.store.gc)
+
+        return self._cookie(session.session_id, max_age=self.max_age)
+
+    async def _touch(self, session: ServerSession) -> str:
+        """Продление неизменившейся сессии: время активности в хранилище и Max-Age cookie"""
+        await asyncio.to_thread(self.store.touch, session.session_id)
+        return self._cookie(session.session_id, max_age=self.max_age)
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.session_cookie}={value}; path={self.path}; Max-Age={max_age}; {self.security_flags}"
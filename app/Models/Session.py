@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, BigInteger, Text, Index
+from config.database import Base
+
+class Session(Base):
+    __tablename__ = "sessions"
+    __table_args__ = (
+        Index("sessions_last_activity_index", "last_activity"),
+    )
+
+    id = Column(String(64), primary_key=True)
+    payload = Column(Text, nullable=False)
+    last_activity = Column(BigInteger, nullable=False)  # unix time, для удаления истекших
+    version = Column(BigInteger, nullable=False)  # time_ns последней записи, для проверки кеша воркера
+
+    def __repr__(self):
+        return f"<Session>"
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy import Column, String, BigInteger, DateTime, Index
 from datetime import datetime
 from config.database import Base
 
 class UsersPasswordHistory(Base):
     __tablename__ = "users_password_history"
+    __table_args__ = (
+        Index("users_password_history_user_id_id_index", "user_id", "id"),
+    )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, nullable=False)
@@ -0,0 +1,8 @@
+# app/Requests/ForgotPasswordRequest.py
+from typing import Optional
+from pydantic import Field
+from app.Requests.FormRequest import FormRequest, MAX_FIELD_LENGTH
+
+
+class ForgotPasswordRequest(FormRequest):
+    email: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
@@ -0,0 +1,15 @@
+# app/Requests/FormRequest.py
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+# Верхняя граница длины поля: защита от огромных значений, а осмысленные
+# ограничения с сообщениями для пользователя проверяет контроллер
+MAX_FIELD_LENGTH = 1024
+
+
+class FormRequest(BaseModel):
+    """Данные формы после RequestParser: лишние поля отбрасываются, значения только строки"""
+
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    csrf_token: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
@@ -0,0 +1,9 @@
+# app/Requests/LoginRequest.py
+from typing import Optional
+from pydantic import Field
+from app.Requests.FormRequest import FormRequest, MAX_FIELD_LENGTH
+
+
+class LoginRequest(FormRequest):
+    login: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    password: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
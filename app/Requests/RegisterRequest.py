@@ -0,0 +1,11 @@
+# app/Requests/RegisterRequest.py
+from typing import Optional
+from pydantic import Field
+from app.Requests.FormRequest import FormRequest, MAX_FIELD_LENGTH
+
+
+class RegisterRequest(FormRequest):
+    token: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    name: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    email: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    password: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
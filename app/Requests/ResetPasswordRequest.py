@@ -0,0 +1,10 @@
+# app/Requests/ResetPasswordRequest.py
+from typing import Optional
+from pydantic import Field
+from app.Requests.FormRequest import FormRequest, MAX_FIELD_LENGTH
+
+
+class ResetPasswordRequest(FormRequest):
+    token: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    email: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
+    password: Optional[str] = Field(None, max_length=MAX_FIELD_LENGTH)
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+from config.app import settings
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:  # Без brotli собираются только .gz-варианты
+        brotli = None
+
+STATIC_DIR = Path("static")
+BUILD_DIR = STATIC_DIR / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+STATIC_URL = "/static/"
+
+# Текстовые форматы, которые имеет смысл сжимать заранее
+COMPRESSIBLE = {".css", ".js", ".map", ".svg", ".json", ".txt", ".html", ".ico", ".xml"}
+MIN_COMPRESS_SIZE = 256
+
+# Ссылки на другие файлы внутри css/js: url(...) и sourceMappingURL
+REFERENCE_PATTERN = re.compile(
+    r"""(?P<prefix>url\(\s*['"]?|sourceMappingURL=)(?P<ref>[^'")\s?#]+)"""
+)
+
+
+class AssetService:
+    """Сборка статики с хешем содержимого в имени и разрешение логических имен в URL"""
+
+    _manifest: Optional[Dict[str, str]] = None
+    _manifest_mtime: Optional[float] = None
+
+    @staticmethod
+    def _fingerprint(relative: str, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = posixpath.splitext(relative)
+        return f"{stem}.{digest}{ext}"
+
+    @staticmethod
+    def _rewrite_references(relative: str, content: bytes, manifest: Dict[str, str]) -> bytes:
+        """Ссылки css/js на собранные файлы заменяются на их версии с хешем"""
+        # Файл с хешем лежит в том же каталоге, что и исходный, поэтому относительные ссылки считаются от base
+        base = posixpath.dirname(relative)
+
+        def replace(match: re.Match) -> str:
+            ref = match.group("ref")
+            if "://" in ref or ref.startswith("data:"):
+                return match.group(0)
+            if ref.startswith(STATIC_URL):
+                target = posixpath.normpath(ref[len(STATIC_URL):])
+            elif ref.startswith("/"):
+                return match.group(0)
+            else:
+                target = posixpath.normpath(posixpath.join(base, ref))
+            if target not in manifest:
+                return match.group(0)
+            if ref.startswith("/"):
+                new_ref = STATIC_URL + "build/" + manifest[target]
+            else:
+                new_ref = posixpath.relpath(manifest[target], base or ".")
+            return match.group("prefix") + new_ref
+
+        text = content.decode("utf-8", "surrogateescape")
+        return REFERENCE_PATTERN.sub(replace, text).encode("utf-8", "surrogateescape")
+
+    @staticmethod
+    def _write_variants(path: Path, content: bytes) -> int:
+        """Запись .gz и .br рядом с файлом, если сжатие дает выигрыш; возвращает число вариантов"""
+        if path.suffix.lower() not in COMPRESSIBLE or len(content) < MIN_COMPRESS_SIZE:
+            return 0
+        written = 0
+        variants = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+        for suffix, compress in variants:
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                written += 1
+        return written
+
+    @staticmethod
+    def build() -> Dict[str, int]:
+        """Полная пересборка static/build и manifest.json"""
+        if BUILD_DIR.exists():
+            shutil.rmtree(BUILD_DIR)
+
+        sources = sorted(
+            path for path in STATIC_DIR.rglob("*")
+            if path.is_file()
+            and BUILD_DIR not in path.parents
+            and not any(part.startswith(".") for part in path.relative_to(STATIC_DIR).parts)
+            and path.suffix not in (".gz", ".br")
+        )
+
+        # Сначала файлы без ссылок на другие, затем css/js, которые на них ссылаются
+        sources.sort(key=lambda path: path.suffix in (".css", ".js"))
+
+        manifest: Dict[str, str] = {}
+        stats = {"files": 0, "bytes": 0, "compressed": 0}
+        for source in sources:
+            relative = source.relative_to(STATIC_DIR).as_posix()
+            content = source.read_bytes()
+            if source.suffix in (".css", ".js"):
+                content = AssetService._rewrite_references(relative, content, manifest)
+
+            hashed = AssetService._fingerprint(relative, content)
+            target = BUILD_DIR / hashed
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            manifest[relative] = hashed
+
+            stats["files"] += 1
+            stats["bytes"] += len(content)
+            stats["compressed"] += AssetService._write_variants(target, content)
+
+        tmp_path = MANIFEST_PATH.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, MANIFEST_PATH)
+        AssetService._manifest = None
+        return stats
+
+    @classmethod
+    def manifest(cls) -> Dict[str, str]:
+        """Манифест загружается один раз; в debug перечитывается после новой сборки"""
+        if cls._manifest is None or settings.debug:
+            try:
+                mtime = MANIFEST_PATH.stat().st_mtime
+            except FileNotFoundError:
+                cls._manifest, cls._manifest_mtime = {}, None
+                return cls._manifest
+            if cls._manifest is None or mtime != cls._manifest_mtime:
+                cls._manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+                cls._manifest_mtime = mtime
+        return cls._manifest
+
+    @classmethod
+    def url(cls, name: str) -> str:
+        """URL файла статики: версия с хешем после assets:build, иначе исходный файл"""
+        name = name.lstrip("/")
+        if name.startswith("static/"):
+            name = name[len("static/"):]
+        hashed = cls.manifest().get(name)
+        if hashed is None:
+            return STATIC_URL + name
+        return STATIC_URL + "build/" + hashed
+
+    @staticmethod
+    def is_fingerprinted(path: str) -> bool:
+        """Путь внутри /static указывает на файл с хешем из static/build"""
+        path = path.lstrip("/")
+        return path.startswith("build/") and path != "build/manifest.json"
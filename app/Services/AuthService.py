@@ -1,4 +1,11 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
 from passlib.context import CryptContext
+from config.app import settings
+from app.Services.TimingService import TimingService
 
 pwd_context = CryptContext(
     schemes=["bcrypt"],
@@ -6,11 +13,94 @@ pwd_context = CryptContext(
     bcrypt__rounds=12
 )
 
+_executor: Optional[Executor] = None
+_workers = 0
+# Отправленные в пул и еще не завершенные проверки/хеширования (меняется только в потоке event loop)
+_in_flight = 0
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    # Функции уровня модуля, чтобы их можно было передать в ProcessPoolExecutor
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _on_done(_: asyncio.Future) -> None:
+    global _in_flight
+    _in_flight -= 1
+
+
+def _submit(fn: Callable, *args) -> asyncio.Future:
+    global _in_flight
+    future = asyncio.get_running_loop().run_in_executor(AuthService.get_executor(), fn, *args)
+    _in_flight += 1
+    future.add_done_callback(_on_done)
+    return future
+
+
 class AuthService:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
-    
+        return _verify(plain_password, hashed_password)
+
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+        return _hash(password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Проверка пароля в пуле исполнителей, не блокируя event loop"""
+        with TimingService.measure("auth"):
+            return await _submit(_verify, plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Хеширование пароля в пуле исполнителей, не блокируя event loop"""
+        with TimingService.measure("auth"):
+            return await _submit(_hash, password)
+
+    @staticmethod
+    async def verify_password_any_async(plain_password: str, hashed_passwords: Iterable[str]) -> bool:
+        """Параллельная проверка пароля по нескольким хешам, останавливается на первом совпадении"""
+        pending = [_submit(_verify, plain_password, hashed_password) for hashed_password in hashed_passwords]
+        try:
+            with TimingService.measure("auth"):
+                for completed in asyncio.as_completed(pending):
+                    if await completed:
+                        return True
+                return False
+        finally:
+            # Ещё не начатые проверки снимаются с очереди пула
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def get_executor() -> Executor:
+        """Ленивое создание пула (process | thread) по настройкам auth_hash_*"""
+        global _executor, _workers
+        if _executor is None:
+            _workers = settings.auth_hash_workers or os.cpu_count() or 1
+            if settings.auth_hash_executor == "thread":
+                _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="bcrypt")
+            else:
+                # fork из процесса с потоками (логи, метрики, пул БД) может унаследовать
+                # захваченную блокировку и зависнуть: воркеры запускает forkserver
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _executor = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context(method))
+        return _executor
+
+    @staticmethod
+    def executor_stats() -> Dict[str, int]:
+        """Загрузка пула хеширования: workers, in_flight и queued (ждут свободного исполнителя)"""
+        workers = _workers if _executor is not None else 0
+        return {"workers": workers, "in_flight": _in_flight, "queued": max(_in_flight - workers, 0)}
+
+    @staticmethod
+    def shutdown_executor() -> None:
+        global _executor
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
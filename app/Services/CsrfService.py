@@ -1,34 +1,88 @@
+import hashlib
+import hmac
+import os
 import secrets
+import time
 from fastapi import Request
 from typing import Optional
+from config.app import settings
 
 class CsrfService:
     CSRF_TOKEN_LENGTH = 32
     CSRF_TOKEN_NAME = "csrf_token"
     CSRF_HEADER_NAME = "X-CSRF-TOKEN"
+    # stateless: ключ сессии со случайным seed, к которому привязаны подписанные токены
+    CSRF_SEED_NAME = "csrf_seed"
 
     @staticmethod
     def generate_token() -> str:
         """Генерация нового CSRF токена"""
         return secrets.token_hex(CsrfService.CSRF_TOKEN_LENGTH)
 
+    @staticmethod
+    def _secret() -> bytes:
+        return os.getenv("SESSION_SECRET_KEY", "").encode()
+
+    @staticmethod
+    def _signature(seed: str, issued_at: str, nonce: str) -> str:
+        message = f"{issued_at}.{nonce}.{seed}".encode()
+        return hmac.new(CsrfService._secret(), message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _seed(request: Request, create: bool) -> Optional[str]:
+        """Seed сессии: записывается в сессию один раз, дальше токены выдаются без записи"""
+        seed = request.session.get(CsrfService.CSRF_SEED_NAME)
+        if seed is None and create:
+            seed = secrets.token_hex(16)
+            request.session[CsrfService.CSRF_SEED_NAME] = seed
+        return seed
+
+    @staticmethod
+    def issue_signed_token(request: Request) -> str:
+        """Токен вида <время выдачи>.<nonce>.<HMAC(время, nonce, seed сессии)>"""
+        seed = CsrfService._seed(request, create=True)
+        issued_at = str(int(time.time()))
+        nonce = secrets.token_hex(8)
+        return f"{issued_at}.{nonce}.{CsrfService._signature(seed, issued_at, nonce)}"
+
+    @staticmethod
+    def validate_signed_token(request: Request, token: str, max_age: Optional[int] = None) -> bool:
+        """Подпись совпадает с seed текущей сессии и токен не старше max_age (по умолчанию csrf_token_lifetime)"""
+        seed = CsrfService._seed(request, create=False)
+        parts = token.split(".")
+        if seed is None or len(parts) != 3 or not parts[0].isdigit():
+            return False
+        issued_at, nonce, signature = parts
+        age = time.time() - int(issued_at)
+        if age > (max_age if max_age is not None else settings.csrf_token_lifetime) or age < -60:
+            return False
+        return hmac.compare_digest(CsrfService._signature(seed, issued_at, nonce), signature)
+
     @staticmethod
     def get_token_from_session(request: Request) -> Optional[str]:
         """Получение CSRF токена из сессии"""
         return request.session.get(CsrfService.CSRF_TOKEN_NAME)
 
     @staticmethod
-    def validate_token(request: Request, token: str) -> bool:
+    def validate_token(request: Request, token: str, max_age: Optional[int] = None) -> bool:
         """Валидация CSRF токена"""
         if not token:
             return False
+        if settings.csrf_mode == "stateless":
+            return CsrfService.validate_signed_token(request, token, max_age)
         session_token = CsrfService.get_token_from_session(request)
         return session_token is not None and secrets.compare_digest(session_token, token)
 
     @staticmethod
     def set_token_to_session(request: Request, token: Optional[str] = None) -> str:
-        """Установка CSRF токена в сессию"""
+        """Установка CSRF токена в сессию.
+
+        В режиме stateless сессия не меняется (кроме первой выдачи seed): возвращается
+        новый подписанный токен, ранее выданные остаются действительными до истечения срока.
+        """
+        if settings.csrf_mode == "stateless":
+            return token if token is not None else CsrfService.issue_signed_token(request)
         if token is None:
             token = CsrfService.generate_token()
         request.session[CsrfService.CSRF_TOKEN_NAME] = token
-        return token
\ No newline at end of file
+        return token
@@ -0,0 +1,106 @@
+# app/Services/EmailDispatcher.py
+import logging
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import Message
+from typing import Callable, List, Optional
+from app.Services.MetricsService import Counter
+from config.mail import mailQueueSize, mailWorkers, mailMaxRetries, mailRetryBackoff
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDispatcher:
+    """Фоновая отправка писем: ограниченная очередь в памяти процесса и пул потоков с повторами"""
+
+    _queue: Optional[queue.Queue] = None
+    _threads: List[threading.Thread] = []
+    _lock = threading.Lock()
+    # Письма, которые не будут отправлены: очередь переполнена / исчерпаны попытки
+    rejected = Counter()
+    failed = Counter()
+
+    @classmethod
+    def start(cls) -> None:
+        with cls._lock:
+            if cls._queue is not None:
+                return
+            cls._queue = queue.Queue(maxsize=mailQueueSize)
+            cls._threads = [
+                threading.Thread(target=cls._worker, args=(cls._queue,), name=f"mail-{i}", daemon=True)
+                for i in range(max(mailWorkers, 1))
+            ]
+            for thread in cls._threads:
+                thread.start()
+
+    @classmethod
+    def submit(cls, send: Callable[[Message], None], msg: Message) -> bool:
+        """Принимает письмо к отправке; False, если очередь переполнена"""
+        cls.start()
+        try:
+            cls._queue.put_nowait((send, msg))
+            return True
+        except queue.Full:
+            cls.rejected.inc()
+            logger.error(f"Mail queue is full ({mailQueueSize}), message to {msg['To']} rejected")
+            return False
+
+    @classmethod
+    def stop(cls, timeout: float = 10.0) -> None:
+        """Дожидается отправки очереди (не дольше timeout) и останавливает потоки"""
+        with cls._lock:
+            if cls._queue is None:
+                return
+            work_queue, threads = cls._queue, cls._threads
+            cls._queue, cls._threads = None, []
+
+        deadline = time.monotonic() + timeout
+        for _ in threads:
+            try:
+                work_queue.put(None, timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        if not work_queue.empty():
+            logger.error(f"Mail dispatcher stopped with {work_queue.qsize()} undelivered messages")
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        # Повторяем обрывы и отказы соединения, таймауты (socket.timeout - это TimeoutError)
+        # и 4xx ответы. SMTPException и ssl.SSLError наследуют OSError, но это ошибки
+        # настройки (нет STARTTLS, неверный сертификат, 5xx, авторизация) - не повторяем
+        if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        if isinstance(error, (smtplib.SMTPException, ssl.SSLError)):
+            return False
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+    @staticmethod
+    def _worker(work_queue: queue.Queue) -> None:
+        while True:
+            job = work_queue.get()
+            if job is None:
+                return
+            send, msg = job
+            for attempt in range(mailMaxRetries + 1):
+                try:
+                    send(msg)
+                    break
+                except Exception as e:
+                    if attempt == mailMaxRetries or not EmailDispatcher._is_transient(e):
+                        EmailDispatcher.failed.inc()
+                        logger.error(f"Failed to send email to {msg['To']} after {attempt + 1} attempt(s): {e}")
+                        break
+                    delay = mailRetryBackoff * 2 ** attempt
+                    logger.warning(f"Email to {msg['To']} failed ({e}), retry in {delay}s")
+                    time.sleep(delay)
+
+    @classmethod
+    def qsize(cls) -> int:
+        return cls._queue.qsize() if cls._queue is not None else 0
@@ -3,13 +3,22 @@ import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+import logging
+from typing import List, Optional
+from app.Services.EmailDispatcher import EmailDispatcher
+from app.Services.SmtpPool import SmtpConnectionPool
+from app.Services.TimingService import TimingService
 from config.mail import (
     mailHost, mailPort, mailUsername, mailPassword, 
     mailEncryption, mailFromAddress, mailFromName,
+    mailTimeout, mailPoolSize, mailPoolIdleCheck, mailPoolMaxIdle,
     appBaseUrl, appBaseName
 )
 
+logger = logging.getLogger(__name__)
+
+_pool: Optional[SmtpConnectionPool] = None
+
 class EmailService:
     
     @staticmethod
@@ -26,77 +35,119 @@ class EmailService:
             
         return True
 
+    @staticmethod
+    def build_html_message(email: str, subject: str, html_content: str) -> MIMEMultipart:
+        """HTML-письмо от имени mailFromName / mailFromAddress"""
+        msg = MIMEMultipart()
+        msg['From'] = f"{mailFromName} <{mailFromAddress}>"
+        msg['To'] = email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(html_content, 'html'))
+        return msg
+
+    @staticmethod
+    def build_password_reset_message(email: str, reset_token: str) -> MIMEMultipart:
+        """Письмо со ссылкой для сброса пароля"""
+        # Генерация ссылки
+        reset_url = f"{appBaseUrl}/password/reset/{reset_token}"
+        
+        # Создание сообщения
+        msg = MIMEMultipart()
+        msg['From'] = f"{mailFromName} <{mailFromAddress}>"
+        msg['To'] = email
+        msg['Subject'] = f"Сброс пароля - {appBaseName}"
+        
+        # HTML содержимое
+        html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>Сброс пароля</title>
+        </head>
+        <body>
+            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <h2>Сброс пароля</h2>
+                <p>Вы получили это письмо, потому что запросили сброс пароля для вашей учетной записи.</p>
+                <p>Для сброса пароля перейдите по ссылке ниже:</p>
+                <p>
+                    <a href="{reset_url}" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; display: inline-block;">
+                        Сбросить пароль
+                    </a>
+                </p>
+                <p>Ссылка действительна в течение 1 часа.</p>
+                <p>Если вы не запрашивали сброс пароля, проигнорируйте это письмо.</p>
+                <hr>
+                <p>С уважением,<br>Команда {appBaseName}</p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        msg.attach(MIMEText(html_content, 'html'))
+        return msg
+
+    @staticmethod
+    def pool() -> SmtpConnectionPool:
+        """Общий пул SMTP-соединений по настройкам config.mail"""
+        global _pool
+        if _pool is None:
+            _pool = SmtpConnectionPool(
+                host=str(mailHost),
+                port=int(mailPort),
+                username=str(mailUsername),
+                password=str(mailPassword),
+                encryption=mailEncryption,
+                timeout=mailTimeout,
+                max_size=mailPoolSize,
+                idle_check=mailPoolIdleCheck,
+                max_idle=mailPoolMaxIdle
+            )
+        return _pool
+
+    @staticmethod
+    def send_message(msg: MIMEMultipart) -> None:
+        """Отправка готового письма через пул соединений; исключения пробрасываются вызывающему"""
+        EmailService._validate_smtp_connection()
+        # В фоновых потоках рассылки замер ничего не делает; в запросе - время синхронной отправки
+        with TimingService.measure("email"):
+            EmailService.pool().send(msg)
+
+    @staticmethod
+    def send_many(messages: List[MIMEMultipart]) -> List[bool]:
+        """Отправка пачки писем по нескольким соединениям пула; результат для каждого письма"""
+        EmailService._validate_smtp_connection()
+        results = EmailService.pool().send_many(messages)
+        for msg, error in zip(messages, results):
+            if error is not None:
+                logger.error(f"Failed to send email to {msg['To']}: {error}")
+        return [error is None for error in results]
+
     @staticmethod
     def send_password_reset_email(email: str, reset_token: str) -> bool:
         """Отправка email с ссылкой для сброса пароля"""
         try:
-            # Проверяем настройки
-            EmailService._validate_smtp_connection()
-            
-            # Генерация ссылки
-            reset_url = f"{appBaseUrl}/password/reset/{reset_token}"
-            
-            # Создание сообщения
-            msg = MIMEMultipart()
-            msg['From'] = f"{mailFromName} <{mailFromAddress}>"
-            msg['To'] = email
-            msg['Subject'] = f"Сброс пароля - {appBaseName}"
-            
-            # HTML содержимое
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>Сброс пароля</title>
-            </head>
-            <body>
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>Сброс пароля</h2>
-                    <p>Вы получили это письмо, потому что запросили сброс пароля для вашей учетной записи.</p>
-                    <p>Для сброса пароля перейдите по ссылке ниже:</p>
-                    <p>
-                        <a href="{reset_url}" style="background-color: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; display: inline-block;">
-                            Сбросить пароль
-                        </a>
-                    </p>
-                    <p>Ссылка действительна в течение 1 часа.</p>
-                    <p>Если вы не запрашивали сброс пароля, проигнорируйте это письмо.</p>
-                    <hr>
-                    <p>С уважением,<br>Команда {appBaseName}</p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(html_content, 'html'))
-            
-            # Явное преобразование типов для TypeScript
-            host = str(mailHost)
-            port = int(mailPort)
-            username = str(mailUsername)
-            password = str(mailPassword)
-            
-            # Отправка через SMTP с SSL
-            if mailEncryption == "ssl":
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(host, port, context=context) as server:
-                    server.login(username, password)
-                    server.send_message(msg)
-            else:
-                # Для TLS
-                with smtplib.SMTP(host, port) as server:
-                    if mailEncryption == "tls":
-                        server.starttls()
-                    server.login(username, password)
-                    server.send_message(msg)
-                
+            EmailService.send_message(EmailService.build_password_reset_message(email, reset_token))
             return True
-            
         except Exception as e:
             print(f"Ошибка отправки email: {e}")
             return False
 
+    @staticmethod
+    def queue_password_reset_email(email: str, reset_token: str) -> bool:
+        """Постановка письма для сброса пароля в очередь фоновой отправки; False - письмо не принято"""
+        with TimingService.measure("email"):
+            return EmailService._queue(EmailService.build_password_reset_message(email, reset_token))
+
+    @staticmethod
+    def _queue(msg: MIMEMultipart) -> bool:
+        try:
+            EmailService._validate_smtp_connection()
+        except ValueError as e:
+            logger.error(f"Mail is not configured, message to {msg['To']} not queued: {e}")
+            return False
+        return EmailDispatcher.submit(EmailService.send_message, msg)
+
     @staticmethod
     def test_connection() -> bool:
         """Тестирование подключения к SMTP серверу"""
@@ -145,59 +196,48 @@ class EmailService:
             print(f"Общая ошибка подключения к SMTP: {e}")
             return False
 
-    # Аналогично обновите send_welcome_email и send_test_email
+    @staticmethod
+    def build_welcome_message(email: str, username: str) -> MIMEMultipart:
+        """Приветственное письмо"""
+        msg = MIMEMultipart()
+        msg['From'] = f"{mailFromName} <{mailFromAddress}>"
+        msg['To'] = email
+        msg['Subject'] = f"Добро пожаловать в {appBaseName}!"
+        
+        html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>Добро пожаловать</title>
+        </head>
+        <body>
+            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <h2>Добро пожаловать, {username}!</h2>
+                <p>Спасибо за регистрацию в {appBaseName}.</p>
+                <p>Теперь вы можете войти в свою учетную запись и начать использовать все возможности нашего фреймворка.</p>
+                <hr>
+                <p>С уважением,<br>Команда {appBaseName}</p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        msg.attach(MIMEText(html_content, 'html'))
+        return msg
+
     @staticmethod
     def send_welcome_email(email: str, username: str) -> bool:
         """Отправка приветственного email"""
         try:
-            EmailService._validate_smtp_connection()
-            
-            msg = MIMEMultipart()
-            msg['From'] = f"{mailFromName} <{mailFromAddress}>"
-            msg['To'] = email
-            msg['Subject'] = f"Добро пожаловать в {appBaseName}!"
-            
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>Добро пожаловать</title>
-            </head>
-            <body>
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <h2>Добро пожаловать, {username}!</h2>
-                    <p>Спасибо за регистрацию в {appBaseName}.</p>
-                    <p>Теперь вы можете войти в свою учетную запись и начать использовать все возможности нашего фреймворка.</p>
-                    <hr>
-                    <p>С уважением,<br>Команда {appBaseName}</p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            msg.attach(MIMEText(html_content, 'html'))
-            
-            # Явное преобразование типов
-            host = str(mailHost)
-            port = int(mailPort)
-            username = str(mailUsername)
-            password = str(mailPassword)
-            
-            if mailEncryption == "ssl":
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(host, port, context=context) as server:
-                    server.login(username, password)
-                    server.send_message(msg)
-            else:
-                with smtplib.SMTP(host, port) as server:
-                    if mailEncryption == "tls":
-                        server.starttls()
-                    server.login(username, password)
-                    server.send_message(msg)
-                
+            EmailService.send_message(EmailService.build_welcome_message(email, username))
             return True
-            
         except Exception as e:
             print(f"Ошибка отправки welcome email: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def queue_welcome_email(email: str, username: str) -> bool:
+        """Постановка приветственного письма в очередь фоновой отправки"""
+        with TimingService.measure("email"):
+            return EmailService._queue(EmailService.build_welcome_message(email, username))
@@ -0,0 +1,38 @@
+import json
+from typing import Any, Union
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Без orjson используется стандартный json
+    orjson = None
+
+
+class JsonService:
+    """Кодирование и разбор JSON: orjson, если установлен, иначе stdlib json"""
+
+    @staticmethod
+    def loads(data: Union[bytes, str]) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        # Тот же вывод, что у JSONResponse Starlette
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse с сериализацией через JsonService"""
+
+    def render(self, content: Any) -> bytes:
+        return JsonService.dumps(content)
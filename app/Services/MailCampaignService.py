@@ -0,0 +1,145 @@
+# app/Services/MailCampaignService.py
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import select
+from app.Models.User import User
+from app.Services.EmailService import EmailService
+from config.database import SessionLocal
+from config.mail import appBaseName, appBaseUrl
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGNS_DIR = Path("storage/framework/campaigns")
+
+
+class Throttle:
+    """Не более rate писем в секунду (0 - без ограничения)"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._started = time.monotonic()
+        self._sent = 0
+
+    def wait(self, count: int) -> None:
+        if self.rate > 0:
+            delay = self._started + (self._sent + count) / self.rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._sent += count
+
+
+class MailCampaign:
+    """Рассылка по всей таблице users.
+
+    Получатели читаются чанками по id (keyset pagination), шаблон компилируется
+    один раз на кампанию, письма уходят через пул SMTP-соединений не более чем
+    по concurrency соединениям. После каждой пачки прогресс сохраняется в
+    storage/framework/campaigns/<name>.json, и повторный запуск с тем же именем
+    продолжает рассылку с последнего отправленного id.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        template: str,
+        subject: str,
+        rate: float = 0,
+        concurrency: int = 4,
+        chunk_size: int = 500
+    ):
+        self.name = name
+        self.template_name = template
+        self.subject = subject
+        self.rate = rate
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.checkpoint_path = CAMPAIGNS_DIR / f"{name}.json"
+        self.failed_path = CAMPAIGNS_DIR / f"{name}.failed"
+
+        env = Environment(
+            loader=FileSystemLoader(os.path.join("app", "Views")),
+            autoescape=select_autoescape(["html"])
+        )
+        self.template = env.get_template(template)
+
+    def load_checkpoint(self) -> Dict:
+        if self.checkpoint_path.exists():
+            return json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+        return {"name": self.name, "template": self.template_name, "last_id": 0, "sent": 0, "failed": 0, "finished": False}
+
+    def save_checkpoint(self, checkpoint: Dict) -> None:
+        CAMPAIGNS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(checkpoint, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset(self) -> None:
+        for path in (self.checkpoint_path, self.failed_path):
+            if path.exists():
+                path.unlink()
+
+    def recipients(self, after_id: int) -> Iterator[List[Tuple[int, str, str]]]:
+        """Чанки (id, name, email) с id > after_id; сессия держится только на время чтения чанка"""
+        while True:
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    select(User.id, User.name, User.email)
+                    .where(User.id > after_id)
+                    .order_by(User.id)
+                    .limit(self.chunk_size)
+                ).all()
+            finally:
+                db.close()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1].id
+
+    def run(self) -> Dict:
+        EmailService._validate_smtp_connection()
+        checkpoint = self.load_checkpoint()
+        if checkpoint["finished"]:
+            return checkpoint
+
+        throttle = Throttle(self.rate)
+        # Пачка за один вызов send_many: не больше секундного лимита, чтобы троттлинг был равномерным
+        batch_size = max(min(self.chunk_size, int(self.rate) or self.chunk_size), 1)
+
+        for rows in self.recipients(checkpoint["last_id"]):
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                messages = [
+                    EmailService.build_html_message(
+                        row.email,
+                        self.subject,
+                        self.template.render(user=row, app_base_name=appBaseName, app_base_url=appBaseUrl)
+                    )
+                    for row in batch
+                ]
+                throttle.wait(len(messages))
+                results = EmailService.pool().send_many(messages, connections=self.concurrency)
+
+                failed = [row for row, error in zip(batch, results) if error is not None]
+                if failed:
+                    self._log_failed(failed, results)
+                checkpoint["last_id"] = batch[-1].id
+                checkpoint["sent"] += len(batch) - len(failed)
+                checkpoint["failed"] += len(failed)
+                self.save_checkpoint(checkpoint)
+
+        checkpoint["finished"] = True
+        self.save_checkpoint(checkpoint)
+        return checkpoint
+
+    def _log_failed(self, rows, results) -> None:
+        errors = [error for error in results if error is not None]
+        with open(self.failed_path, "a", encoding="utf-8") as f:
+            for row, error in zip(rows, errors):
+                f.write(f"{row.id}\t{row.email}\t{error}\n")
+        logger.warning(f"Campaign {self.name}: {len(rows)} message(s) failed, see {self.failed_path}")
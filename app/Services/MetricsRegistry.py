@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.Services.AuthService import AuthService
+from app.Services.EmailDispatcher import EmailDispatcher
+from app.Services.EmailService import EmailService
+from app.Services.JsonService import JsonService
+from app.Services.QueryMonitor import QueryMonitor
+from app.Services.RateLimitService import RateLimitService, SharedRateLimitBackend
+from app.Services.TimingService import TimingService
+from config import pool
+from config.app import settings
+from config.logging import BatchingQueueHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows: один процесс, блокировка не нужна
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# charset=utf-8 Starlette добавляет сам для text/*
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Ключ в pool_stats() -> метрика пула соединений
+POOL_METRICS = (
+    ("gauge", "db_pool_size", "size", "Configured pool size"),
+    ("gauge", "db_pool_checked_out", "checked_out", "Connections in use"),
+    ("gauge", "db_pool_checked_in", "checked_in", "Idle connections in the pool"),
+    ("gauge", "db_pool_overflow", "overflow", "Connections opened above pool size"),
+    ("counter", "db_pool_timeouts_total", "timeouts", "Checkout timeouts"),
+    ("counter", "db_pool_disconnects_total", "disconnects", "Disconnects that invalidated the pool"),
+    ("histogram", "db_pool_wait_seconds", "wait_seconds", "Time waiting for a connection checkout"),
+    ("histogram", "db_pool_hold_seconds", "hold_seconds", "Time from checkout to checkin of a connection"),
+)
+
+# Счетчики и гистограммы остановленных воркеров
+RETIRED = "retired.json"
+_STARTED = time.time_ns()
+
+
+def _family(kind: str, name: str, help: str, samples: List, aggregate: str = "sum") -> Dict[str, Any]:
+    """Метрика со значениями [[метки, значение], ...]; aggregate - как gauge складывается по воркерам"""
+    return {"name": name, "type": kind, "help": help, "aggregate": aggregate, "samples": samples}
+
+
+def _copy(kind: str, value: Any) -> Any:
+    if kind == "histogram":
+        return {"buckets": dict(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+    return value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsRegistry:
+    """Метрики всех воркеров uvicorn в текстовом формате Prometheus.
+
+    Каждый воркер раз в metrics_flush_interval секунд пишет снимок своих
+    метрик в <metrics_path>/<pid>-<запуск>.json. /metrics складывает снимки
+    остальных воркеров с текущим состоянием своего: счетчики и гистограммы
+    суммируются, gauge берутся только у работающих воркеров. При остановке
+    воркера (или если снимок не обновлялся metrics_worker_ttl секунд) его
+    счетчики переносятся в retired.json, поэтому суммы не уменьшаются.
+    """
+
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        """/metrics включен; в production - только с metrics_token"""
+        if not settings.metrics_enabled:
+            return False
+        if settings.environment == "production" and not settings.metrics_token:
+            logger.warning("/metrics is disabled: metrics_token must be set in production")
+            return False
+        return True
+
+    @staticmethod
+    def collect() -> List[Dict[str, Any]]:
+        """Метрики текущего процесса"""
+        timings = TimingService.snapshot()
+        queries = QueryMonitor.snapshot()
+        pools = pool.pool_stats()
+        hashing = AuthService.executor_stats()
+        smtp = EmailService.pool()
+        limiter = RateLimitService.backend()
+
+        families = [
+            _family("histogram", "http_request_duration_seconds", "Request latency by route", [
+                [{"route": route}, phases["total"]] for route, phases in timings.items() if "total" in phases
+            ]),
+            _family("histogram", "http_request_phase_seconds", "Time spent in a request phase by route", [
+                [{"route": route, "phase": phase}, snapshot]
+                for route, phases in timings.items() for phase, snapshot in phases.items() if phase != "total"
+            ]),
+            _family("counter", "http_requests_total", "Responses by route and status", [
+                [{"route": route, "status": str(status)}, count]
+                for (route, status), count in TimingService.status_counts().items()
+            ]),
+        ]
+
+        for kind, name, key, help in POOL_METRICS:
+            families.append(_family(kind, name, help, [
+                [{"pool": pool_name}, stats[key]] for pool_name, stats in pools.items() if key in stats
+            ]))
+
+        families += [
+            _family("histogram", "db_request_connection_hold_seconds", "Total connection hold time per request",
+                    [[{}, pool.request_hold_stats()]]),
+            _family("histogram", "db_queries_per_request", "SQL statements per request by route", [
+                [{"route": route}, snapshot] for route, snapshot in queries["queries_per_request"].items()
+            ]),
+            _family("counter", "db_slow_queries_total", "Statements slower than sql_slow_query_threshold",
+                    [[{}, queries["slow_queries"]]]),
+            _family("counter", "db_flagged_requests_total", "Requests above sql_request_query_threshold",
+                    [[{}, queries["flagged_requests"]]]),
+            _family("counter", "db_repeated_statements_total", "Statements repeated sql_repeat_threshold times in a request",
+                    [[{}, queries["repeated_statements"]]]),
+            _family("gauge", "auth_hash_workers", "Password hashing executor workers", [[{}, hashing["workers"]]]),
+            _family("gauge", "auth_hash_in_flight", "Password hashes submitted and not finished", [[{}, hashing["in_flight"]]]),
+            _family("gauge", "auth_hash_queue_depth", "Password hashes waiting for a free worker", [[{}, hashing["queued"]]]),
+            _family("histogram", "email_send_duration_seconds", "SMTP send latency", [[{}, smtp.send_seconds.snapshot()]]),
+            _family("counter", "email_send_failures_total", "Failed SMTP send attempts", [[{}, smtp.send_failures.value]]),
+            _family("counter", "email_dropped_total", "Emails that will not be delivered", [
+                [{"reason": "queue_full"}, EmailDispatcher.rejected.value],
+                [{"reason": "retries_exhausted"}, EmailDispatcher.failed.value],
+            ]),
+            _family("gauge", "email_queue_depth", "Emails waiting in the dispatcher queue", [[{}, EmailDispatcher.qsize()]]),
+            # Общая mmap-таблица одна на хост: у всех воркеров одно значение, поэтому max, а не сумма
+            _family("gauge", "rate_limit_table_entries", "Rate limiter keys with active state",
+                    [[{}, RateLimitService.size()]],
+                    aggregate="max" if isinstance(limiter, SharedRateLimitBackend) else "sum"),
+            _family("counter", "log_records_dropped_total", "Log records dropped: queue full or write failed", [
+                [{"handler": handler.name or ""}, handler.dropped.value] for handler in BatchingQueueHandler.instances
+            ]),
+            _family("gauge", "log_queue_depth", "Log records waiting to be written", [
+                [{"handler": handler.name or ""}, handler.qsize()] for handler in BatchingQueueHandler.instances
+            ]),
+        ]
+        return families
+
+    @staticmethod
+    def merge(snapshots: Iterable[Tuple[List[Dict[str, Any]], bool]]) -> Dict[str, Dict[str, Any]]:
+        """Сложение снимков воркеров [(метрики, воркер работает)] по имени метрики и меткам"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for families, live in snapshots:
+            for family in families:
+                kind = family["type"]
+                if kind == "gauge" and not live:
+                    continue
+                target = merged.get(family["name"])
+                if target is None:
+                    target = merged[family["name"]] = {**family, "samples": {}}
+                samples = target["samples"]
+                for labels, value in family["samples"]:
+                    key = tuple(sorted((name, str(label)) for name, label in labels.items()))
+                    current = samples.get(key)
+                    if current is None:
+                        samples[key] = _copy(kind, value)
+                    elif kind == "histogram":
+                        for le, count in value["buckets"].items():
+                            current["buckets"][le] = current["buckets"].get(le, 0) + count
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                    elif kind == "gauge" and family.get("aggregate") == "max":
+                        samples[key] = max(current, value)
+                    else:
+                        samples[key] = current + value
+        return merged
+
+    @staticmethod
+    def render(merged: Dict[str, Dict[str, Any]]) -> str:
+        """Текстовый формат Prometheus 0.0.4"""
+        lines = []
+        for name in sorted(merged):
+            family = merged[name]
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for key in sorted(family["samples"]):
+                value = family["samples"][key]
+                if family["type"] == "histogram":
+                    for le, count in value["buckets"].items():
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {_number(count)}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(value['sum'])}")
+                    lines.append(f"{name}_count{_labels(key)} {_number(value['count'])}")
+                else:
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def exposition(cls) -> str:
+        """Ответ /metrics: текущий воркер и снимки остальных"""
+        return cls.render(cls.merge([(cls.collect(), True)] + cls.load_workers()))
+
+    @staticmethod
+    def _snapshot_path() -> Path:
+        # pid и время запуска процесса: воркер с переиспользованным pid не перезапишет чужой снимок
+        return Path(settings.metrics_path) / f"{os.getpid()}-{_STARTED:x}.json"
+
+    @staticmethod
+    @contextmanager
+    def _locked(directory: Path, exclusive: bool) -> Iterator[None]:
+        """Чтение снимков (shared) не пересекается с переносом счетчиков в retired.json (exclusive)"""
+        with open(directory / ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return JsonService.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping metrics snapshot {path.name}: {e}")
+            return None
+
+    @staticmethod
+    def _write(path: Path, content: Dict[str, Any]) -> None:
+        # Файл заменяется атомарно: читатели не видят половину записи
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(JsonService.dumps(content))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def flush(cls) -> None:
+        """Запись снимка текущего воркера"""
+        path = cls._snapshot_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cls._write(path, {"pid": os.getpid(), "updated": time.time(), "families": cls.collect()})
+
+    @classmethod
+    def load_workers(cls) -> List[Tuple[List[Dict[str, Any]], bool]]:
+        """Снимки остальных воркеров и retired.json; воркер считается работающим, пока обновляет свой файл"""
+        directory = Path(settings.metrics_path)
+        if not directory.is_dir():
+            return []
+        own = cls._snapshot_path().name
+        now = time.time()
+        live_window = settings.metrics_flush_interval * 3
+        result = []
+        stale = []
+        with cls._locked(directory, exclusive=False):
+            retired = cls._read(directory / RETIRED) or {"families": [], "folded": []}
+            result.append((retired["families"], False))
+            for path in directory.glob("*.json"):
+                if path.name in (own, RETIRED) or path.name in retired["folded"]:
+                    continue
+                snapshot = cls._read(path)
+                if snapshot is None:
+                    continue
+                age = now - snapshot.get("updated", 0)
+                result.append((snapshot["families"], age <= live_window))
+                if age > settings.metrics_worker_ttl:
+                    stale.append(path.name)
+        for name in stale:
+            # Воркер давно не обновлял снимок - остановлен аварийно
+            cls._retire(directory, name)
+        return result
+
+    @classmethod
+    def _retire(cls, directory: Path, name: str, families: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Перенос счетчиков и гистограмм воркера в retired.json и удаление его снимка.
+
+        Сумма по всем воркерам при этом не уменьшается, поэтому Prometheus не видит
+        сброса счетчика. Перенесенный файл удаляется после записи retired.json;
+        до удаления он указан в "folded" и читателями пропускается.
+        """
+        with cls._locked(directory, exclusive=True):
+            retired = cls._read(directory / RETIRED) or {"families": [], "folded": []}
+            if name in retired["folded"]:
+                return
+            if families is None:
+                snapshot = cls._read(directory / name)
+                if snapshot is None:
+                    return
+                families = snapshot["families"]
+            # Файлы из прошлых переносов уже учтены в retired.json
+            for folded in retired["folded"]:
+                (directory / folded).unlink(missing_ok=True)
+            merged = cls.merge([(retired["families"], False), (families, False)])
+            cls._write(directory / RETIRED, {
+                "families": [
+                    {**family, "samples": [[dict(key), value] for key, value in family["samples"].items()]}
+                    for family in merged.values()
+                ],
+                "folded": [name],
+            })
+            (directory / name).unlink(missing_ok=True)
+
+    @classmethod
+    def _safe_flush(cls) -> None:
+        try:
+            cls.flush()
+        except Exception as e:
+            logger.warning(f"Failed to write metrics snapshot: {e}")
+
+    @classmethod
+    async def _flush_loop(cls) -> None:
+        while True:
+            await asyncio.to_thread(cls._safe_flush)
+            await asyncio.sleep(settings.metrics_flush_interval)
+
+    @classmethod
+    def start(cls) -> None:
+        """Периодическая запись снимка воркера (из lifespan)"""
+        if cls._task is None and cls.enabled():
+            cls._task = asyncio.get_running_loop().create_task(cls._flush_loop())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Перенос итоговых счетчиков воркера в retired.json; gauge воркера больше не учитываются"""
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+        try:
+            directory = Path(settings.metrics_path)
+            directory.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(cls._retire, directory, cls._snapshot_path().name, cls.collect())
+        except Exception as e:
+            logger.warning(f"Failed to retire metrics snapshot: {e}")
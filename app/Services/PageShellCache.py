@@ -0,0 +1,80 @@
+# app/Services/PageShellCache.py
+import hashlib
+from typing import Dict, List
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from markupsafe import escape
+from app.Services.AssetService import AssetService
+from app.Services.CsrfService import CsrfService
+from config.app import settings
+from config.templates import templates
+
+# Метка вместо CSRF-токена при рендере оболочки; в ответе заменяется токеном запроса
+CSRF_SLOT = "@@csrf-token-slot@@"
+
+
+class PageShell:
+    """Страница, отрендеренная один раз, в виде байтов вокруг слотов для CSRF-токена"""
+
+    __slots__ = ("template", "manifest", "parts", "digest")
+
+    def __init__(self, template, manifest: Dict[str, str], parts: List[bytes], digest: str):
+        self.template = template
+        self.manifest = manifest
+        self.parts = parts
+        self.digest = digest
+
+
+class PageShellCache:
+    """Кеш страниц, у которых от запроса зависит только CSRF-токен (auth/auth.html).
+
+    Шаблон рендерится один раз на версию: перерендер происходит, если Jinja
+    перезагрузила шаблон (auto_reload вне production) или сменился манифест
+    статики. На запрос токен вклеивается между заранее закодированными частями.
+
+    ETag = хеш оболочки + токен страницы: если у клиента страница с еще
+    действующим токеном, отвечаем 304 без вклейки и без выдачи нового токена.
+    Шаблоны оболочек не должны использовать request и другие данные запроса.
+    """
+
+    _shells: Dict[str, PageShell] = {}
+
+    @classmethod
+    def shell(cls, name: str) -> PageShell:
+        template = templates.env.get_template(name)
+        manifest = AssetService.manifest()
+        shell = cls._shells.get(name)
+        if shell is None or shell.template is not template or shell.manifest is not manifest:
+            html = template.render(csrf_token=CSRF_SLOT).encode("utf-8")
+            shell = PageShell(
+                template,
+                manifest,
+                html.split(CSRF_SLOT.encode("utf-8")),
+                hashlib.sha256(html).hexdigest()[:16]
+            )
+            cls._shells[name] = shell
+        return shell
+
+    @staticmethod
+    def etag(shell: PageShell, token: str) -> str:
+        # Токен в ETag: у клиента эта страница вместе с токеном, других данных заголовок не раскрывает
+        return f'"{shell.digest}-{token}"'
+
+    @classmethod
+    def response(cls, request: Request, name: str) -> Response:
+        shell = cls.shell(name)
+        headers = {"Cache-Control": "private, no-cache", "Vary": "Cookie"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            for tag in if_none_match.split(","):
+                digest, _, token = tag.strip().removeprefix("W/").strip('"').partition("-")
+                # Страница у клиента актуальна, и токен в ней действует еще хотя бы половину срока
+                if digest == shell.digest and CsrfService.validate_token(
+                    request, token, max_age=settings.csrf_token_lifetime // 2
+                ):
+                    return Response(status_code=304, headers={**headers, "ETag": cls.etag(shell, token)})
+
+        token = CsrfService.set_token_to_session(request)
+        body = str(escape(token)).encode("utf-8").join(shell.parts)
+        return HTMLResponse(body, headers={**headers, "ETag": cls.etag(shell, token)})
@@ -0,0 +1,153 @@
+import logging
+import re
+import threading
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+from app.Services.MetricsService import Histogram
+from config.app import settings
+
+logger = logging.getLogger(__name__)
+# Отдельный файл storage/logs/slow_queries.log (config/logging.py)
+slow_logger = logging.getLogger("sql.slow")
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+# IN (?, ?, ?) с любым числом параметров сворачивается в IN (?)
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+# Текст запроса -> нормализованный; набор запросов ORM ограничен, кеш сбрасывается при переполнении
+_normalized: Dict[str, str] = {}
+NORMALIZED_CACHE_SIZE = 2048
+
+
+def normalize(statement: str) -> str:
+    """Запрос без литералов и с одинаковыми списками параметров: ключ для поиска повторов"""
+    normalized = _normalized.get(statement)
+    if normalized is None:
+        normalized = _PLACEHOLDER_LIST.sub("(?)", statement)
+        normalized = _LITERALS.sub("?", normalized)
+        normalized = _SPACES.sub(" ", normalized).strip()
+        if len(_normalized) >= NORMALIZED_CACHE_SIZE:
+            _normalized.clear()
+        _normalized[statement] = normalized
+    return normalized
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Типы параметров без значений: в лог не попадают пароли и email"""
+    if executemany:
+        count = len(parameters)
+        return f"{count}x {parameter_shape(parameters[0])}" if count else "0x"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class RequestQueries:
+    """Запросы к БД одного HTTP-запроса: по нормализованному тексту - [число, время, строки]"""
+
+    __slots__ = ("route", "count", "seconds", "statements")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, List] = {}
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+class QueryMonitor:
+    """Учет SQL по запросам: число запросов, повторы одного запроса (N+1) и медленные запросы.
+
+    Вызывается из событий движка (config/pool.py); на запрос к БД - поиск в
+    словаре и несколько сложений, поэтому включен и в production.
+    """
+
+    _histograms: Dict[str, Histogram] = {}
+    _lock = threading.Lock()
+    slow_queries = 0
+    flagged_requests = 0
+    repeated_statements = 0
+
+    @staticmethod
+    def start(route: str) -> Token:
+        return _current.set(RequestQueries(route))
+
+    @staticmethod
+    def record(statement: str, parameters: Any, seconds: float, rows: int, executemany: bool) -> None:
+        if not settings.sql_monitor:
+            return
+        queries = _current.get()
+        slow = seconds >= settings.sql_slow_query_threshold
+        if queries is None and not slow:
+            return
+        normalized = normalize(statement)
+        if queries is not None:
+            queries.count += 1
+            queries.seconds += seconds
+            stats = queries.statements.get(normalized)
+            if stats is None:
+                queries.statements[normalized] = [1, seconds, max(rows, 0)]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] += max(rows, 0)
+
+        if slow:
+            QueryMonitor.slow_queries += 1
+            slow_logger.warning(
+                f"{seconds * 1000:.1f}ms rows={rows} route={queries.route if queries else '-'} "
+                f"params={parameter_shape(parameters, executemany)} sql={normalized}"
+            )
+
+    @classmethod
+    def finish(cls, token: Token) -> Optional[RequestQueries]:
+        """Конец учета запроса: гистограмма числа запросов по маршруту и предупреждения о превышениях"""
+        queries = _current.get()
+        _current.reset(token)
+        if queries is None or not settings.sql_monitor:
+            return queries
+
+        cls.histogram(queries.route).observe(queries.count)
+
+        if queries.count > settings.sql_request_query_threshold:
+            cls.flagged_requests += 1
+            logger.warning(
+                f"{queries.route}: {queries.count} SQL statements in one request "
+                f"({queries.seconds * 1000:.1f}ms, threshold {settings.sql_request_query_threshold})"
+            )
+
+        for normalized, (count, seconds, rows) in queries.statements.items():
+            if count >= settings.sql_repeat_threshold:
+                cls.repeated_statements += 1
+                logger.warning(
+                    f"{queries.route}: possible N+1, statement repeated {count} times "
+                    f"({seconds * 1000:.1f}ms, {rows} rows): {normalized}"
+                )
+        return queries
+
+    @classmethod
+    def histogram(cls, route: str) -> Histogram:
+        histogram = cls._histograms.get(route)
+        if histogram is None:
+            with cls._lock:
+                histogram = cls._histograms.setdefault(route, Histogram(QUERY_COUNT_BUCKETS))
+        return histogram
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        with cls._lock:
+            routes = dict(cls._histograms)
+        return {
+            "queries_per_request": {route: histogram.snapshot() for route, histogram in routes.items()},
+            "slow_queries": cls.slow_queries,
+            "flagged_requests": cls.flagged_requests,
+            "repeated_statements": cls.repeated_statements,
+        }
@@ -1,27 +1,148 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
 import time
-from typing import Dict, Tuple
+from collections import OrderedDict
+from pathlib import Path
+from config.app import settings
 
+try:
+    import fcntl
+except ImportError:  # Windows: разделяемая таблица недоступна, используется память процесса
+    fcntl = None
 
-class RateLimitService:
-    """Simple in-memory rate limiter for per-key throttling."""
 
-    _attempts: Dict[str, Tuple[int, float]] = {}
+class MemoryRateLimitBackend:
+    """GCRA в памяти процесса: ограниченный размер, истекшие ключи удаляются по ходу работы"""
 
-    @classmethod
-    def check_and_increment(cls, key: str, limit: int, window_seconds: int) -> bool:
-        """Returns True if within limit; increments attempt counter."""
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> TAT (theoretical arrival time); порядок = давность последнего обновления
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_and_increment(self, key: str, limit: int, window_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + window_seconds / limit
+            if new_tat - now > window_seconds:
+                return False
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            return True
+
+    def _evict(self, now: float) -> None:
+        # Самые давно обновленные ключи в начале: проверяем максимум два за вызов
+        for _ in range(2):
+            if not self._tats:
+                return
+            key, tat = next(iter(self._tats.items()))
+            if tat > now and len(self._tats) < self.max_keys:
+                return
+            del self._tats[key]
+
+    def size(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for tat in self._tats.values() if tat > now)
+
+
+class SharedRateLimitBackend:
+    """GCRA в общей для всех воркеров хеш-таблице фиксированного размера в mmap-файле.
+
+    Таблица разбита на корзины по BUCKET_SLOTS слотов, каждая корзина блокируется
+    отдельно (fcntl.lockf на диапазон байт). Слот хранит 64-битный хеш ключа и TAT;
+    слот с TAT в прошлом считается свободным, поэтому вытеснение занимает O(1).
+    """
+
+    SLOT = struct.Struct("<Qd")
+    BUCKET_SLOTS = 8
+
+    def __init__(self, path: str, slots: int):
+        self.buckets = max(slots // self.BUCKET_SLOTS, 1)
+        self.bucket_size = self.SLOT.size * self.BUCKET_SLOTS
+        size = self.buckets * self.bucket_size
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        # Блокировки fcntl действуют между процессами, потоки одного процесса разделяет этот lock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def check_and_increment(self, key: str, limit: int, window_seconds: int) -> bool:
+        key_hash = self._hash(key)
+        offset = (key_hash % self.buckets) * self.bucket_size
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.bucket_size, offset)
+            try:
+                now = time.time()
+                slot_offset, tat = self._find_slot(offset, key_hash, now)
+                new_tat = max(tat, now) + window_seconds / limit
+                if new_tat - now > window_seconds:
+                    return False
+                self.SLOT.pack_into(self._map, slot_offset, key_hash, new_tat)
+                return True
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.bucket_size, offset)
+
+    def _find_slot(self, offset: int, key_hash: int, now: float):
+        """Слот ключа с его TAT, иначе свободный/истекший слот, иначе слот, истекающий раньше всех"""
+        free_offset = None
+        oldest_offset, oldest_tat = offset, float("inf")
+        for slot_offset in range(offset, offset + self.bucket_size, self.SLOT.size):
+            slot_hash, tat = self.SLOT.unpack_from(self._map, slot_offset)
+            if slot_hash == key_hash:
+                return slot_offset, tat
+            if free_offset is None and (slot_hash == 0 or tat <= now):
+                free_offset = slot_offset
+            if tat < oldest_tat:
+                oldest_offset, oldest_tat = slot_offset, tat
+        return (free_offset if free_offset is not None else oldest_offset), now
+
+    def size(self) -> int:
         now = time.time()
-        attempts, window_start = cls._attempts.get(key, (0, now))
+        return sum(1 for slot_hash, tat in self.SLOT.iter_unpack(self._map) if slot_hash and tat > now)
 
-        # Reset window if expired
-        if now - window_start >= window_seconds:
-            attempts = 0
-            window_start = now
 
-        attempts += 1
-        cls._attempts[key] = (attempts, window_start)
+class RateLimitService:
+    """Rate limiter (GCRA): не более limit попыток за window_seconds на ключ.
 
-        return attempts <= limit
+    rate_limit_backend=shared хранит состояние в mmap-таблице, общей для всех
+    воркеров uvicorn на хосте; memory — в памяти процесса.
+    """
 
+    _backend = None
 
+    @classmethod
+    def backend(cls):
+        if cls._backend is None:
+            if settings.rate_limit_backend == "shared" and fcntl is not None:
+                cls._backend = SharedRateLimitBackend(settings.rate_limit_table_path, settings.rate_limit_table_slots)
+            else:
+                cls._backend = MemoryRateLimitBackend(settings.rate_limit_table_slots)
+        return cls._backend
+
+    @classmethod
+    def check_and_increment(cls, key: str, limit: int, window_seconds: int) -> bool:
+        """Returns True if within limit; increments attempt counter."""
+        return cls.backend().check_and_increment(key, limit, window_seconds)
 
+    @classmethod
+    def size(cls) -> int:
+        """Количество ключей с активным (неистекшим) состоянием"""
+        return cls.backend().size()
@@ -1,47 +1,104 @@
-from fastapi import Request, Form
-from typing import Dict, Any
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Any, Optional, Type, TypeVar
 import urllib.parse
-import json
 import logging
+from config.app import settings
+from app.Services.JsonService import JsonService
+from app.Services.TimingService import TimingService
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T", bound=BaseModel)
+
+
+class RequestParseError(Exception):
+    """Тело запроса нельзя принять: status_code и сообщение для клиента"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
 class RequestParser:
     @staticmethod
-    async def parse_request(request: Request) -> Dict[str, Any]:
+    async def read_body(request: Request, max_body_size: Optional[int] = None) -> bytes:
+        """Чтение тела с ограничением размера: 413 по Content-Length или как только поток превысит лимит"""
+        limit = settings.request_max_body_size if max_body_size is None else max_body_size
+        if hasattr(request, "_body"):
+            body = request._body
+        else:
+            content_length = request.headers.get("content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+                raise RequestParseError(413, "Слишком большой запрос")
+
+            chunks = []
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise RequestParseError(413, "Слишком большой запрос")
+                chunks.append(chunk)
+            body = b"".join(chunks)
+            # Starlette отдает сохраненное тело в request.body()/form() без повторного чтения
+            request._body = body
+
+        if len(body) > limit:
+            raise RequestParseError(413, "Слишком большой запрос")
+        return body
+
+    @staticmethod
+    async def parse_request(request: Request, max_body_size: Optional[int] = None) -> Dict[str, Any]:
+        """Разбор тела за один проход по content-type; некорректное тело дает {}"""
+        with TimingService.measure("parse"):
+            return await RequestParser._parse_request(request, max_body_size)
+
+    @staticmethod
+    async def _parse_request(request: Request, max_body_size: Optional[int]) -> Dict[str, Any]:
         content_type = request.headers.get("content-type", "").lower()
-        
-        if "application/x-www-form-urlencoded" in content_type:
-            try:
-                body = await request.body()
-                decoded_body = body.decode('utf-8')
-                return dict(urllib.parse.parse_qsl(decoded_body))
-            except (UnicodeDecodeError, ValueError) as e:
-                logger.warning(f"Failed to decode form-urlencoded body: {e}")
-                return {}
-            
-        elif "multipart/form-data" in content_type:
+        body = await RequestParser.read_body(request, max_body_size)
+        if not body:
+            return {}
+
+        if "multipart/form-data" in content_type:
             try:
+                # form() разбирает уже прочитанное тело из request._body
                 form_data = await request.form()
                 return dict(form_data)
             except Exception as e:
                 logger.warning(f"Failed to parse multipart form data: {e}")
                 return {}
-            
-        elif "application/json" in content_type:
+
+        # Неизвестный content-type: по первому символу, без попытки разобрать тело дважды
+        is_json = "application/json" in content_type or (
+            "application/x-www-form-urlencoded" not in content_type
+            and body.lstrip()[:1] in (b"{", b"[")
+        )
+        if is_json:
             try:
-                return await request.json()
-            except Exception as e:
+                data = JsonService.loads(body)
+            except ValueError as e:
                 logger.warning(f"Failed to parse JSON: {e}")
                 return {}
-            
-        else:
+            if not isinstance(data, dict):
+                logger.warning(f"JSON body is not an object: {type(data).__name__}")
+                return {}
+            return data
+
+        try:
+            return dict(urllib.parse.parse_qsl(body.decode("utf-8")))
+        except (UnicodeDecodeError, ValueError) as e:
+            logger.warning(f"Failed to decode form-urlencoded body: {e}")
+            return {}
+
+    @staticmethod
+    async def parse(request: Request, model: Type[T], max_body_size: Optional[int] = None) -> T:
+        """Разбор тела в модель из app/Requests; неверные типы или длины полей дают 400"""
+        with TimingService.measure("parse"):
+            data = await RequestParser._parse_request(request, max_body_size)
             try:
-                form_data = await request.form()
-                return dict(form_data)
-            except Exception as e:
-                try:
-                    return await request.json()
-                except Exception as json_error:
-                    logger.warning(f"Failed to parse request body: form={e}, json={json_error}")
-                    return {}
\ No newline at end of file
+                return model.model_validate(data)
+            except ValidationError as e:
+                logger.warning(f"Invalid {model.__name__} payload: {e.error_count()} errors")
+                raise RequestParseError(400, "Некорректные данные запроса")
@@ -0,0 +1,323 @@
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from config.app import settings
+
+# secrets.token_urlsafe(32): 43 символа base64url; все прочие значения cookie игнорируются
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+
+class MemorySessionStore:
+    """Сессии в памяти процесса (LRU). Подходит только для одного воркера"""
+
+    def __init__(self, max_entries: int, lifetime: int):
+        self.max_entries = max_entries
+        self.lifetime = lifetime
+        # id -> (payload, last_activity, version); порядок = давность последней записи
+        self._sessions: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, session_id: str) -> Optional[Tuple[str, float, int]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        if entry is None or entry[1] + self.lifetime < time.time():
+            return None
+        return entry
+
+    def state(self, session_id: str) -> Optional[Tuple[int, float]]:
+        entry = self._entry(session_id)
+        return (entry[2], entry[1]) if entry else None
+
+    def read(self, session_id: str) -> Optional[Tuple[str, int, float]]:
+        entry = self._entry(session_id)
+        return (entry[0], entry[2], entry[1]) if entry else None
+
+    def write(self, session_id: str, payload: str) -> int:
+        version = time.time_ns()
+        with self._lock:
+            self._sessions[session_id] = (payload, time.time(), version)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return version
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions[session_id] = (entry[0], time.time(), entry[2])
+                self._sessions.move_to_end(session_id)
+
+    def destroy(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def gc(self) -> None:
+        expired_before = time.time() - self.lifetime
+        with self._lock:
+            while self._sessions:
+                session_id, (_, last_activity, _) = next(iter(self._sessions.items()))
+                if last_activity > expired_before:
+                    break
+                del self._sessions[session_id]
+
+
+class FileSessionStore:
+    """Файл на сессию в storage/framework/sessions.
+
+    mtime файла - время последней активности (запись или touch). Версия -
+    (inode, mtime_ns): запись заменяет файл через os.replace, поэтому inode
+    меняется даже при грубом разрешении mtime файловой системы. touch тоже
+    меняет версию: кеш воркера один раз перечитает файл.
+    """
+
+    def __init__(self, path: str, lifetime: int):
+        self.path = Path(path)
+        self.lifetime = lifetime
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _state(self, stat: os.stat_result) -> Optional[Tuple[Tuple[int, int], float]]:
+        if stat.st_mtime + self.lifetime < time.time():
+            return None
+        return (stat.st_ino, stat.st_mtime_ns), stat.st_mtime
+
+    def state(self, session_id: str) -> Optional[Tuple[Tuple[int, int], float]]:
+        try:
+            return self._state(os.stat(self.path / session_id))
+        except FileNotFoundError:
+            return None
+
+    def read(self, session_id: str) -> Optional[Tuple[str, Tuple[int, int], float]]:
+        try:
+            with open(self.path / session_id, "r", encoding="utf-8") as f:
+                state = self._state(os.fstat(f.fileno()))
+                return (f.read(), *state) if state else None
+        except FileNotFoundError:
+            return None
+
+    def write(self, session_id: str, payload: str) -> Tuple[int, int]:
+        # Запись во временный файл и атомарная замена: параллельный read не увидит половину данных
+        file_path = self.path / session_id
+        tmp_path = self.path / f"{session_id}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path.write_text(payload, encoding="utf-8")
+        os.replace(tmp_path, file_path)
+        stat = os.stat(file_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def touch(self, session_id: str) -> None:
+        try:
+            os.utime(self.path / session_id)
+        except FileNotFoundError:
+            pass
+
+    def destroy(self, session_id: str) -> None:
+        try:
+            os.unlink(self.path / session_id)
+        except FileNotFoundError:
+            pass
+
+    def gc(self) -> None:
+        expired_before = time.time() - self.lifetime
+        for entry in os.scandir(self.path):
+            try:
+                if entry.stat().st_mtime < expired_before:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+class DatabaseSessionStore:
+    """Сессии в таблице sessions; чтение всегда с primary, чтобы не получить устаревшие данные с реплики"""
+
+    def __init__(self, lifetime: int):
+        self.lifetime = lifetime
+
+    @staticmethod
+    def _session():
+        # Импорт здесь: модель и движок нужны только драйверу database
+        from config.database import SessionLocal
+        from config.routing import pin_primary
+
+        db = SessionLocal()
+        pin_primary(db)
+        return db
+
+    def state(self, session_id: str) -> Optional[Tuple[int, float]]:
+        from app.Models.Session import Session
+
+        db = self._session()
+        try:
+            row = db.execute(
+                select(Session.version, Session.last_activity)
+                .where(Session.id == session_id, Session.last_activity >= int(time.time()) - self.lifetime)
+            ).first()
+            return (row.version, row.last_activity) if row else None
+        finally:
+            db.close()
+
+    def read(self, session_id: str) -> Optional[Tuple[str, int, float]]:
+        from app.Models.Session import Session
+
+        db = self._session()
+        try:
+            row = db.execute(
+                select(Session.payload, Session.version, Session.last_activity)
+                .where(Session.id == session_id, Session.last_activity >= int(time.time()) - self.lifetime)
+            ).first()
+            return (row.payload, row.version, row.last_activity) if row else None
+        finally:
+            db.close()
+
+    def write(self, session_id: str, payload: str) -> int:
+        from app.Models.Session import Session
+
+        version = time.time_ns()
+        values = {"payload": payload, "last_activity": int(time.time()), "version": version}
+        db = self._session()
+        try:
+            result = db.execute(update(Session).where(Session.id == session_id).values(**values))
+            if result.rowcount == 0:
+                try:
+                    db.add(Session(id=session_id, **values))
+                    db.flush()
+                except IntegrityError:
+                    # Параллельный запрос успел создать ту же сессию
+                    db.rollback()
+                    db.execute(update(Session).where(Session.id == session_id).values(**values))
+            db.commit()
+            return version
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def touch(self, session_id: str) -> None:
+        # version не меняется: данные те же, кеши воркеров остаются действительными
+        from app.Models.Session import Session
+
+        db = self._session()
+        try:
+            db.execute(update(Session).where(Session.id == session_id).values(last_activity=int(time.time())))
+            db.commit()
+        finally:
+            db.close()
+
+    def destroy(self, session_id: str) -> None:
+        from app.Models.Session import Session
+
+        db = self._session()
+        try:
+            db.execute(delete(Session).where(Session.id == session_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def gc(self) -> None:
+        from app.Models.Session import Session
+
+        db = self._session()
+        try:
+            db.execute(delete(Session).where(Session.last_activity < int(time.time()) - self.lifetime))
+            db.commit()
+        finally:
+            db.close()
+
+
+class CachedSessionStore:
+    """LRU декодированных сессий перед файловым или database-хранилищем.
+
+    Запись из кеша отдается, только если версия в хранилище совпадает с
+    закешированной: другой воркер мог изменить сессию. Проверка версии -
+    stat файла или выборка двух колонок по первичному ключу, без чтения и
+    разбора payload. Методы блокирующие: вызываются через asyncio.to_thread.
+    """
+
+    def __init__(self, store, max_entries: int):
+        self.store = store
+        self.max_entries = max_entries
+        # id -> (версия в хранилище, данные)
+        self._entries: "OrderedDict[str, Tuple[object, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict, float]]:
+        """(данные, время последней активности) или None для истекшей/неизвестной сессии"""
+        with self._lock:
+            cached = self._entries.get(session_id)
+        if cached is not None:
+            state = self.store.state(session_id)
+            if state is not None and state[0] == cached[0]:
+                with self._lock:
+                    if session_id in self._entries:
+                        self._entries.move_to_end(session_id)
+                return dict(cached[1]), state[1]
+
+        entry = self.store.read(session_id)
+        if entry is None:
+            self._forget(session_id)
+            return None
+        payload, version, last_activity = entry
+        data = json.loads(payload)
+        self._remember(session_id, version, data)
+        return dict(data), last_activity
+
+    def save(self, session_id: str, data: Dict) -> None:
+        version = self.store.write(session_id, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        self._remember(session_id, version, dict(data))
+
+    def touch(self, session_id: str) -> None:
+        """Продление сессии без записи данных"""
+        self.store.touch(session_id)
+
+    def destroy(self, session_id: str) -> None:
+        self._forget(session_id)
+        self.store.destroy(session_id)
+
+    def gc(self) -> None:
+        self.store.gc()
+
+    def _remember(self, session_id: str, version: object, data: Dict) -> None:
+        with self._lock:
+            self._entries[session_id] = (version, data)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SessionService:
+    """Серверные сессии: в cookie только непрозрачный id, данные - в хранилище session_driver"""
+
+    _store: Optional[CachedSessionStore] = None
+
+    @staticmethod
+    def generate_id() -> str:
+        return secrets.token_urlsafe(32)
+
+    @staticmethod
+    def is_valid_id(session_id: Optional[str]) -> bool:
+        return bool(session_id) and SESSION_ID_PATTERN.match(session_id) is not None
+
+    @classmethod
+    def store(cls) -> CachedSessionStore:
+        if cls._store is None:
+            lifetime = settings.session_lifetime
+            if settings.session_driver == "database":
+                backend = DatabaseSessionStore(lifetime)
+            elif settings.session_driver == "memory":
+                backend = MemorySessionStore(settings.session_cache_size, lifetime)
+            else:
+                backend = FileSessionStore(settings.session_files_path, lifetime)
+            cls._store = CachedSessionStore(backend, settings.session_cache_size)
+        return cls._store
@@ -0,0 +1,177 @@
+# app/Services/SmtpPool.py
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import Message
+from typing import Iterator, List, Optional, Sequence
+from app.Services.MetricsService import Counter, Histogram
+
+# Время отправки письма, включая установку соединения
+SEND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _SMTP_SSL(smtplib.SMTP_SSL):
+    """SMTP_SSL, передающий сохраненную TLS-сессию в handshake (session resumption)"""
+
+    def __init__(self, *args, tls_session: Optional[ssl.SSLSession] = None, **kwargs):
+        self.tls_session = tls_session
+        super().__init__(*args, **kwargs)
+
+    def _get_socket(self, host, port, timeout):
+        new_socket = smtplib.SMTP._get_socket(self, host, port, timeout)
+        return self.context.wrap_socket(new_socket, server_hostname=self._host, session=self.tls_session)
+
+
+class SmtpConnectionPool:
+    """Пул авторизованных SMTP-соединений.
+
+    Соединения выдаются в порядке LIFO. Простаивавшее дольше idle_check секунд
+    соединение проверяется NOOP, старше max_idle - закрывается. Сломанное
+    соединение отбрасывается, письмо один раз повторяется на новом.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        encryption: str = "ssl",
+        timeout: float = 10,
+        max_size: int = 4,
+        idle_check: float = 30,
+        max_idle: float = 300
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.encryption = encryption
+        self.timeout = timeout
+        self.max_size = max_size
+        self.idle_check = idle_check
+        self.max_idle = max_idle
+
+        self._idle = deque()  # (smtp, время возврата в пул)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._context = ssl.create_default_context()
+        self._tls_session: Optional[ssl.SSLSession] = None
+        # Каждая попытка send(): успешная или с ошибкой
+        self.send_seconds = Histogram(SEND_BUCKETS)
+        self.send_failures = Counter()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.encryption == "ssl":
+            smtp = _SMTP_SSL(
+                self.host, self.port, context=self._context, timeout=self.timeout, tls_session=self._tls_session
+            )
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.encryption == "tls":
+                smtp.starttls(context=self._context)
+        try:
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+
+        if isinstance(smtp.sock, ssl.SSLSocket) and smtp.sock.session is not None:
+            self._tls_session = smtp.sock.session
+        return smtp
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    @staticmethod
+    def _is_alive(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                smtp, released_at = self._idle.pop()
+            idle = time.monotonic() - released_at
+            if idle > self.max_idle or (idle > self.idle_check and not self._is_alive(smtp)):
+                self._close(smtp)
+                continue
+            return smtp
+        return self._connect()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"SMTP pool exhausted ({self.max_size} connections)")
+        smtp = None
+        try:
+            smtp = self._checkout()
+            yield smtp
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # Сервер ответил отказом, соединение исправно
+            raise
+        except Exception:
+            if smtp is not None:
+                smtp.close()
+                smtp = None
+            raise
+        finally:
+            if smtp is not None:
+                with self._lock:
+                    self._idle.append((smtp, time.monotonic()))
+            self._slots.release()
+
+    def send(self, msg: Message) -> None:
+        started = time.perf_counter()
+        try:
+            self._send(msg)
+        except Exception:
+            self.send_failures.inc()
+            raise
+        finally:
+            self.send_seconds.observe(time.perf_counter() - started)
+
+    def _send(self, msg: Message) -> None:
+        # smtplib сам делает RSET после отклоненной транзакции, соединение остается пригодным
+        try:
+            with self.connection() as smtp:
+                smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Сервер мог закрыть простаивающее соединение - один повтор на новом
+            with self.connection() as smtp:
+                smtp.send_message(msg)
+
+    def send_many(self, messages: Sequence[Message], connections: Optional[int] = None) -> List[Optional[Exception]]:
+        """Отправка пачки писем по нескольким соединениям; результат: None или ошибка для каждого письма"""
+        results: List[Optional[Exception]] = [None] * len(messages)
+        workers = max(min(connections or self.max_size, self.max_size, len(messages)), 1)
+
+        def run(worker: int) -> None:
+            for index in range(worker, len(messages), workers):
+                try:
+                    self.send(messages[index])
+                except Exception as e:
+                    results[index] = e
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as executor:
+            list(executor.map(run, range(workers)))
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for smtp, _ in idle:
+            self._close(smtp)
@@ -0,0 +1,339 @@
+# app/Services/StaticFiles.py
+import hashlib
+import mimetypes
+import os
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, List, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+from app.Services.AssetService import AssetService
+from config.app import settings
+
+# Порядок предпочтения заранее сжатых вариантов
+ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Кодировки из Accept-Encoding, кроме явно запрещенных через q=0"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles, отдающий .br/.gz-варианты из assets:build по Accept-Encoding.
+
+    Файлы с хешем в имени (static/build) отдаются с Cache-Control: immutable:
+    при изменении содержимого меняется и URL.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        variant = self._variant(str(full_path), request_headers.get("accept-encoding", ""))
+
+        if variant is not None:
+            encoding, variant_path, variant_stat = variant
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                stat_result=variant_stat,
+                # Тип по исходному файлу, а не по .br/.gz
+                media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+            if self._has_variants(str(full_path)):
+                response.headers["Vary"] = "Accept-Encoding"
+
+        if AssetService.is_fingerprinted(self.get_path(scope).replace(os.sep, "/")):
+            response.headers["Cache-Control"] = IMMUTABLE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _variant(full_path: str, accept_encoding: str) -> Optional[Tuple[str, str, os.stat_result]]:
+        if not accept_encoding:
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                try:
+                    return encoding, full_path + suffix, os.stat(full_path + suffix)
+                except FileNotFoundError:
+                    continue
+        return None
+
+    @staticmethod
+    def _has_variants(full_path: str) -> bool:
+        return any(os.path.exists(full_path + suffix) for _, suffix in ENCODINGS)
+
+
+class _StaticEntry:
+    """Закешированный ответ для файла: заголовки, ETag и (для небольших файлов) содержимое"""
+
+    __slots__ = ("path", "size", "mtime_ns", "headers", "body", "checked_at", "immutable")
+
+    def __init__(self, path: str, stat_result: os.stat_result, headers: Dict[str, str], body: Optional[bytes], immutable: bool):
+        self.path = path
+        self.size = stat_result.st_size
+        self.mtime_ns = stat_result.st_mtime_ns
+        self.headers = headers
+        self.body = body
+        self.checked_at = time.monotonic()
+        self.immutable = immutable
+
+
+def byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Один диапазон bytes=a-b | a- | -n -> (start, end) включительно.
+
+    None - заголовок не поддерживается (несколько диапазонов, другие единицы) и
+    отдается весь файл; ValueError - диапазон вне файла (416).
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, separator, last = spec.strip().partition("-")
+    if not separator or not (first or last):
+        return None
+    if (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """Отдача файла или его диапазона частями, без чтения целиком в память.
+
+    Если сервер поддерживает ASGI-расширение http.response.zerocopysend,
+    файл передается через sendfile без копирования в процесс.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int, headers: Dict[str, str]):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.background = None
+        self.raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    @staticmethod
+    def _read(file, offset: int, size: int) -> bytes:
+        file.seek(offset)
+        return file.read(size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False
+                })
+                return
+
+            offset, remaining = self.offset, self.length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(self._read, file, offset, min(self.chunk_size, remaining))
+                if not chunk:
+                    # Файл укоротился во время отдачи
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            file.close()
+
+
+class CachedStaticFiles(PrecompressedStaticFiles):
+    """Сервер статики с кешем горячих файлов в памяти и поддержкой Range.
+
+    Для каждого файла (и выбранного .br/.gz-варианта) кешируются заголовки с
+    ETag и Last-Modified, для файлов не больше static_cache_max_file_size -
+    еще и содержимое, в пределах LRU-бюджета static_cache_max_bytes. Запись
+    перепроверяется через stat не чаще раза в static_cache_check_interval
+    секунд, файлы с хешем в имени не перепроверяются никогда. Поэтому
+    If-None-Match / If-Modified-Since и повторные запросы горячих файлов
+    обычно обслуживаются без обращения к файловой системе.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_bytes: Optional[int] = None,
+        max_file_size: Optional[int] = None,
+        check_interval: Optional[float] = None,
+        max_entries: int = 10000,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_bytes = settings.static_cache_max_bytes if max_bytes is None else max_bytes
+        self.max_file_size = settings.static_cache_max_file_size if max_file_size is None else max_file_size
+        self.check_interval = settings.static_cache_check_interval if check_interval is None else check_interval
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Tuple[str, ...]], _StaticEntry]" = OrderedDict()
+        self._cached_bytes = 0
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        accepted = accepted_encodings(accept_encoding) if accept_encoding else set()
+        key = (path, tuple(encoding for encoding, _ in ENCODINGS if encoding in accepted))
+
+        entry = self._entries.get(key)
+        if entry is not None and (entry.immutable or time.monotonic() - entry.checked_at < self.check_interval):
+            self._entries.move_to_end(key)
+        else:
+            fresh = await anyio.to_thread.run_sync(self._load_entry, path, key[1], entry)
+            if fresh is None:
+                self._forget(key)
+                # Каталоги, 404 и ошибки доступа - стандартной логикой StaticFiles
+                return await super().get_response(path, scope)
+            if fresh is not entry:
+                self._remember(key, fresh)
+            entry = fresh
+
+        return self._respond(entry, scope, request_headers)
+
+    def _load_entry(self, path: str, encodings: Tuple[str, ...], previous: Optional[_StaticEntry]) -> Optional[_StaticEntry]:
+        try:
+            full_path, stat_result = self.lookup_path(path)
+        except PermissionError:
+            return None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        served_path, served_stat, encoding = full_path, stat_result, None
+        for name, suffix in ENCODINGS:
+            if name in encodings:
+                try:
+                    served_path, served_stat, encoding = full_path + suffix, os.stat(full_path + suffix), name
+                    break
+                except FileNotFoundError:
+                    continue
+
+        if (
+            previous is not None
+            and previous.path == served_path
+            and previous.mtime_ns == served_stat.st_mtime_ns
+            and previous.size == served_stat.st_size
+        ):
+            previous.checked_at = time.monotonic()
+            return previous
+
+        etag_base = f"{served_stat.st_mtime_ns}-{served_stat.st_size}".encode()
+        headers = {
+            "content-type": self._media_type(full_path),
+            "content-length": str(served_stat.st_size),
+            "last-modified": formatdate(served_stat.st_mtime, usegmt=True),
+            "etag": f'"{hashlib.md5(etag_base, usedforsecurity=False).hexdigest()}"',
+            "accept-ranges": "bytes"
+        }
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+        if encoding is not None or self._has_variants(full_path):
+            headers["vary"] = "Accept-Encoding"
+        immutable = AssetService.is_fingerprinted(path.replace(os.sep, "/"))
+        if immutable:
+            headers["cache-control"] = IMMUTABLE
+
+        body = None
+        if served_stat.st_size <= self.max_file_size:
+            with open(served_path, "rb") as f:
+                body = f.read()
+            if len(body) != served_stat.st_size:
+                # Файл меняется прямо сейчас - не кешируем содержимое
+                body = None
+        return _StaticEntry(served_path, served_stat, headers, body, immutable)
+
+    @staticmethod
+    def _media_type(full_path: str) -> str:
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        if media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        return media_type
+
+    def _respond(self, entry: _StaticEntry, scope: Scope, request_headers: Headers) -> Response:
+        if self.is_not_modified(Headers(entry.headers), request_headers):
+            return NotModifiedResponse(Headers(entry.headers))
+
+        start, end, status_code = 0, entry.size - 1, 200
+        headers = entry.headers
+        range_header = request_headers.get("range")
+        if range_header and scope["method"] == "GET" and self._if_range_matches(entry, request_headers):
+            try:
+                requested = byte_range(range_header, entry.size)
+            except ValueError:
+                return Response(status_code=416, headers={"content-range": f"bytes */{entry.size}"})
+            if requested is not None:
+                start, end = requested
+                status_code = 206
+                headers = dict(
+                    entry.headers,
+                    **{"content-length": str(end - start + 1), "content-range": f"bytes {start}-{end}/{entry.size}"}
+                )
+
+        if entry.body is not None:
+            body = b"" if scope["method"] == "HEAD" else entry.body[start:end + 1]
+            return Response(body, status_code=status_code, headers=headers)
+        return FileRangeResponse(entry.path, start, end - start + 1, status_code, headers)
+
+    @staticmethod
+    def _if_range_matches(entry: _StaticEntry, request_headers: Headers) -> bool:
+        """If-Range: диапазон отдается, только если клиент держит ту же версию файла"""
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range in (entry.headers["etag"], entry.headers["last-modified"])
+
+    def _remember(self, key: Tuple[str, Tuple[str, ...]], entry: _StaticEntry) -> None:
+        self._forget(key)
+        if entry.body is not None and len(entry.body) > self.max_bytes:
+            entry.body = None
+        self._entries[key] = entry
+        self._cached_bytes += len(entry.body or b"")
+        while self._entries and (self._cached_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, evicted = self._entries.popitem(last=False)
+            self._cached_bytes -= len(evicted.body or b"")
+
+    def _forget(self, key: Tuple[str, Tuple[str, ...]]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._cached_bytes -= len(entry.body or b"")
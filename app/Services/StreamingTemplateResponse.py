@@ -0,0 +1,60 @@
+# app/Services/StreamingTemplateResponse.py
+import time
+from typing import AsyncIterator, Dict, Mapping, Optional
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+from config.templates import streaming_templates
+from app.Services.TimingService import TimingService
+
+HEAD_END = "</head>"
+
+
+class StreamingTemplateResponse(StreamingResponse):
+    """Ответ, который отправляет страницу по мере рендера (Jinja generate_async).
+
+    Все до </head> включительно уходит первым чанком, чтобы браузер начал
+    загружать CSS и JS, пока рендерится тело; остальное отправляется частями
+    не меньше chunk_size символов. Статус и заголовки отправляются до рендера,
+    поэтому ошибка в шаблоне после этого только обрывает ответ.
+
+        return StreamingTemplateResponse("main/index.html", {"request": request, ...})
+    """
+
+    media_type = "text/html"
+
+    def __init__(
+        self,
+        name: str,
+        context: Dict,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+        chunk_size: int = 16 * 1024
+    ):
+        self.template = streaming_templates.get_template(name)
+        self.context = context
+        self.chunk_size = chunk_size
+        super().__init__(self._chunks(), status_code=status_code, headers=headers, background=background)
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        buffer = []
+        size = 0
+        head_sent = False
+        # В фазу template идет только время рендера, без ожидания отправки чанков клиенту
+        timings = TimingService.current()
+        rendering = 0.0
+        started = time.perf_counter()
+        async for fragment in self.template.generate_async(self.context):
+            buffer.append(fragment)
+            size += len(fragment)
+            if (not head_sent and HEAD_END in fragment) or size >= self.chunk_size:
+                head_sent = head_sent or HEAD_END in fragment
+                rendering += time.perf_counter() - started
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+                started = time.perf_counter()
+        rendering += time.perf_counter() - started
+        if timings is not None:
+            timings.add("template", rendering)
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
@@ -0,0 +1,134 @@
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
+from app.Services.MetricsService import Histogram
+
+# Фазы в порядке вывода в Server-Timing
+PHASES = ("parse", "validate", "db", "auth", "session", "email", "template")
+
+
+class RequestTimings:
+    """Время фаз одного запроса: суммарная длительность и число вызовов"""
+
+    __slots__ = ("started", "phases")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            phase[0] += seconds
+            phase[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing: фазы и общее время в миллисекундах"""
+        names = sorted(self.phases, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES))
+        parts = []
+        for name in names:
+            seconds, count = self.phases[name]
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{int(count)}x"'
+            parts.append(part)
+        parts.append(f"app;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+class _Measure:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: Optional[RequestTimings], name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class TimingService:
+    """Замер фаз обработки запроса (contextvar) и гистограммы по маршрутам.
+
+    Вне запроса (фоновые потоки, консольные команды) замеры ничего не делают.
+
+        with TimingService.measure("auth"):
+            ...
+    """
+
+    _histograms: Dict[Tuple[str, str], Histogram] = {}
+    # (маршрут, статус ответа) -> число запросов
+    _statuses: Dict[Tuple[str, int], int] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start() -> Tuple[RequestTimings, Token]:
+        timings = RequestTimings()
+        return timings, _current.set(timings)
+
+    @staticmethod
+    def stop(token: Token) -> None:
+        _current.reset(token)
+
+    @staticmethod
+    def current() -> Optional[RequestTimings]:
+        return _current.get()
+
+    @staticmethod
+    def measure(name: str) -> _Measure:
+        return _Measure(_current.get(), name)
+
+    @staticmethod
+    def add(name: str, seconds: float) -> None:
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+    @classmethod
+    def histogram(cls, route: str, phase: str) -> Histogram:
+        key = (route, phase)
+        histogram = cls._histograms.get(key)
+        if histogram is None:
+            with cls._lock:
+                histogram = cls._histograms.setdefault(key, Histogram())
+        return histogram
+
+    @classmethod
+    def observe(cls, route: str, timings: RequestTimings, status: Optional[int] = None) -> None:
+        """Запись завершенного запроса в гистограммы маршрута: общее время и каждая фаза"""
+        cls.histogram(route, "total").observe(timings.elapsed())
+        for name, (seconds, _) in timings.phases.items():
+            cls.histogram(route, name).observe(seconds)
+        if status is not None:
+            key = (route, status)
+            with cls._lock:
+                cls._statuses[key] = cls._statuses.get(key, 0) + 1
+
+    @classmethod
+    def status_counts(cls) -> Dict[Tuple[str, int], int]:
+        """{(маршрут, статус): число запросов}"""
+        with cls._lock:
+            return dict(cls._statuses)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Dict]]:
+        """{маршрут: {фаза: снимок гистограммы}}"""
+        with cls._lock:
+            items = list(cls._histograms.items())
+        result: Dict[str, Dict[str, Dict]] = {}
+        for (route, phase), histogram in items:
+            result.setdefault(route, {})[phase] = histogram.snapshot()
+        return result
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from email_validator import validate_email, EmailNotValidError
+from config.app import settings
+from app.Services.TimingService import TimingService
+
+logger = logging.getLogger(__name__)
+
+# Правила компилируются один раз при импорте, а не в каждом запросе
+NAME_PATTERN = re.compile(r"^[a-zA-Zа-яА-ЯёЁ\s\-]+$")
+PASSWORD_PATTERN = re.compile(r"(?=^.{10,72}$)(?=.*[A-Z])(?=.*[0-9])(?=.*[a-z])(?=.*[^\w\s]).*")
+NAME_MIN_LENGTH = 2
+NAME_MAX_LENGTH = 255
+
+
+class ValidationService:
+    """Общие правила проверки данных форм и кеш DNS-проверок доставляемости email"""
+
+    # Домен -> (доставляем, момент истечения); LRU с ограничением размера
+    _deliverability: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+    _lock = threading.Lock()
+    # Одновременные запросы с одним доменом ждут один DNS-запрос
+    _inflight: Dict[str, asyncio.Future] = {}
+    # dns.resolver.Resolver для проверок; None - резолвер dnspython по умолчанию
+    resolver = None
+
+    @staticmethod
+    def is_valid_name(name: str) -> bool:
+        return NAME_MIN_LENGTH <= len(name) <= NAME_MAX_LENGTH and NAME_PATTERN.match(name) is not None
+
+    @staticmethod
+    def is_valid_password(password: str) -> bool:
+        return PASSWORD_PATTERN.fullmatch(password) is not None
+
+    @classmethod
+    async def normalize_email(cls, email: str, check_deliverability: bool = False) -> Optional[str]:
+        """Нормализованный email или None. Синтаксис проверяется всегда, DNS - только по запросу
+        и если не отключен в настройках"""
+        with TimingService.measure("validate"):
+            try:
+                valid = validate_email(email, check_deliverability=False)
+            except EmailNotValidError:
+                return None
+
+            if check_deliverability and settings.email_check_deliverability:
+                if not await cls.is_deliverable(valid.ascii_domain, valid.domain):
+                    return None
+            return valid.normalized
+
+    @classmethod
+    async def is_deliverable(cls, ascii_domain: str, domain: str) -> bool:
+        cached = cls._cached(ascii_domain)
+        if cached is not None:
+            return cached
+
+        future = cls._inflight.get(ascii_domain)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[ascii_domain] = future
+        try:
+            # Резолвер dnspython блокирующий: запрос уходит в поток, event loop не ждет DNS
+            result = await asyncio.to_thread(cls._lookup, ascii_domain, domain)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим; без этого asyncio предупреждает о непрочитанном future
+            future.exception()
+            raise
+        finally:
+            cls._inflight.pop(ascii_domain, None)
+
+    @classmethod
+    def _cached(cls, ascii_domain: str) -> Optional[bool]:
+        with cls._lock:
+            entry = cls._deliverability.get(ascii_domain)
+            if entry is None:
+                return None
+            deliverable, expires_at = entry
+            if expires_at <= time.monotonic():
+                del cls._deliverability[ascii_domain]
+                return None
+            cls._deliverability.move_to_end(ascii_domain)
+            return deliverable
+
+    @classmethod
+    def _lookup(cls, ascii_domain: str, domain: str) -> bool:
+        # Импорт deliverability тянет dns.resolver, поэтому только при первой проверке
+        from email_validator.deliverability import validate_email_deliverability
+        from email_validator import EmailUndeliverableError
+
+        started = time.perf_counter()
+        try:
+            if cls.resolver is None:
+                info = validate_email_deliverability(ascii_domain, domain, timeout=settings.email_dns_timeout)
+            else:
+                info = validate_email_deliverability(ascii_domain, domain, dns_resolver=cls.resolver)
+            deliverable = True
+            # Таймаут или отказ резолверов не считается ошибкой адреса, но и надолго не кешируется
+            ttl = settings.email_dns_negative_ttl if "unknown-deliverability" in info else settings.email_dns_cache_ttl
+        except EmailUndeliverableError:
+            deliverable = False
+            ttl = settings.email_dns_negative_ttl
+
+        elapsed = time.perf_counter() - started
+        if elapsed > 1.0:
+            logger.warning(f"Slow DNS deliverability check for {ascii_domain}: {elapsed:.2f}s")
+
+        if ttl > 0:
+            with cls._lock:
+                cls._deliverability[ascii_domain] = (deliverable, time.monotonic() + ttl)
+                cls._deliverability.move_to_end(ascii_domain)
+                while len(cls._deliverability) > settings.email_dns_cache_size:
+                    cls._deliverability.popitem(last=False)
+        return deliverable
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._lock:
+            cls._deliverability.clear()
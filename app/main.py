@@ -1,7 +1,7 @@
 # app/main.py
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware 
 import logging.config
 import sys
 from pathlib import Path
@@ -13,28 +13,62 @@ sys.path.append(str(Path(__file__).parent.parent))
 from config import route
 from config.app import settings
 from config.logging import LOGGING
+from app.Services.AuthService import AuthService
+from app.Services.EmailDispatcher import EmailDispatcher
+from app.Services.MetricsRegistry import MetricsRegistry
+from config import pool
+from app.Middleware.rate_limit import RateLimitMiddleware
+from app.Middleware.session import SessionMiddleware
+from app.Middleware.path_scope import PathScopedMiddleware
+from app.Middleware.server_timing import ServerTimingMiddleware
+from app.Services.StaticFiles import CachedStaticFiles
 
 session_secret = os.getenv("SESSION_SECRET_KEY")
 if not session_secret or len(session_secret) < 32:
     raise RuntimeError("SESSION_SECRET_KEY must be set and at least 32 characters long")
 
-app = FastAPI(title=settings.appBaseName)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.database_pool_warmup:
+        await pool.warm_up()
+    MetricsRegistry.start()
+    yield
+    await MetricsRegistry.stop()
+    AuthService.shutdown_executor()
+    await asyncio.to_thread(EmailDispatcher.stop)
+
+app = FastAPI(title=settings.app_base_name, lifespan=lifespan)
 
 logging.config.dictConfig(LOGGING)
 
 # https_only только в production для работы в development без HTTPS
 https_only = settings.environment == "production"
 
+# Добавлен раньше SessionMiddleware, поэтому выполняется внутри него и видит сессию
 app.add_middleware(
-    SessionMiddleware,
-    secret_key = session_secret,
-    session_cookie="session",      
-    max_age=60 * 60 * 24 * 7,
+    PathScopedMiddleware,
+    middleware=RateLimitMiddleware,
+    exclude=route.stateless_paths,
+    rules=route.rate_limits
+)
+
+# Статика, health и metrics обходят сессию: ни разбора cookie, ни обращения к хранилищу
+app.add_middleware(
+    PathScopedMiddleware,
+    middleware=SessionMiddleware,
+    exclude=route.stateless_paths,
+    session_cookie=settings.session_cookie,
+    max_age=settings.session_lifetime,
     same_site="lax",
-    https_only=https_only
+    https_only=https_only,
+    gc_probability=settings.session_gc_probability,
+    touch_interval=settings.session_touch_interval
 )
 
+# Внешний слой: в замер попадают сессия и rate limit
+app.add_middleware(ServerTimingMiddleware, header=settings.server_timing_header)
+
 app.include_router(route.router)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
@@ -0,0 +1,209 @@
+# benchmarks/db_hold_time.py
+"""
+Время удержания соединений пула на запрос к POST /auth/login: прежняя
+зависимость get_async_db (сессия живет до teardown, соединение удерживается
+и на время bcrypt) против LazyDbSession с release() перед проверкой пароля.
+Часть запросов отклоняется по CSRF до обращения к БД (--invalid).
+
+Бенчмарк создает пользователя bench-hold@example.com в настроенной БД
+приложения и удаляет его в конце.
+
+    python -m benchmarks.db_hold_time --requests 200 --concurrency 16 --invalid 0.5
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete, event
+from app.main import app
+from app.Models.User import User
+from app.Services.AuthService import AuthService
+from config import pool
+from config.app import settings
+from config.database import AsyncSessionLocal, SessionLocal, SyncSessionAdapter, get_async_db
+
+EMAIL = "bench-hold@example.com"
+PASSWORD = "Benchmark-Passw0rd!"
+TOKEN_PATTERN = re.compile(rb'<meta name="csrf-token" content="([^"]+)"')
+
+
+async def _no_release() -> None:
+    pass
+
+
+async def legacy_get_async_db():
+    """get_async_db до LazyDbSession; release() контроллеров ничего не делает"""
+    token = pool.track_request()
+    try:
+        if settings.database_async:
+            async with AsyncSessionLocal() as db:
+                db.release = _no_release
+                yield db
+        else:
+            db = SessionLocal()
+            try:
+                adapter = SyncSessionAdapter(db)
+                adapter.release = _no_release
+                yield adapter
+            finally:
+                db.close()
+    finally:
+        pool.finish_request(token)
+
+
+class Occupancy:
+    """Текущее и пиковое число соединений, выданных из пула"""
+
+    def __init__(self, engine):
+        self.current = 0
+        self.peak = 0
+        event.listen(engine, "checkout", self.checkout)
+        event.listen(engine, "checkin", self.checkin)
+
+    def checkout(self, *args) -> None:
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def checkin(self, *args) -> None:
+        self.current -= 1
+
+
+async def call(method: str, path: str, headers: list, body: bytes, client_ip: str) -> tuple:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")] + headers,
+        # Отдельный адрес на запрос, чтобы не упираться в rate limit входа
+        "client": (client_ip, 50000),
+        "server": ("localhost", 8000),
+    }
+    status = 0
+    response_headers = []
+    chunks = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message["headers"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+async def login_form() -> tuple:
+    status, headers, body = await call("GET", "/login", [], b"", "10.0.0.1")
+    if status != 200:
+        raise SystemExit(f"/login: HTTP {status}")
+    cookie = next((value.split(b";")[0] for name, value in headers if name == b"set-cookie"), None)
+    return cookie, TOKEN_PATTERN.search(body).group(1).decode()
+
+
+def hold_totals() -> tuple:
+    snapshot = pool.request_hold_stats()
+    return snapshot["sum"], snapshot["count"]
+
+
+async def run(mode: str, args, occupancy: Occupancy) -> dict:
+    app.dependency_overrides.clear()
+    if mode == "legacy":
+        app.dependency_overrides[get_async_db] = legacy_get_async_db
+
+    cookie, token = await login_form()
+    headers = [(b"content-type", b"application/x-www-form-urlencoded")]
+    if cookie:
+        headers.append((b"cookie", cookie))
+    valid = urllib.parse.urlencode({"csrf_token": token, "login": EMAIL, "password": PASSWORD}).encode()
+    invalid = urllib.parse.urlencode({"csrf_token": "forged", "login": EMAIL, "password": PASSWORD}).encode()
+
+    hold_sum, hold_count = hold_totals()
+    occupancy.peak = occupancy.current
+    latencies = []
+    errors = 0
+    counter = 0
+
+    async def client():
+        nonlocal counter, errors
+        while counter < args.requests:
+            counter += 1
+            # Доля --invalid запросов отклоняется по CSRF, остальные - успешный вход
+            body = invalid if counter % 100 < args.invalid * 100 else valid
+            ip = f"10.{counter // 65536 % 256}.{counter // 256 % 256}.{counter % 256}"
+            started = time.perf_counter()
+            status, _, _ = await call("POST", "/auth/login", headers, body, ip)
+            latencies.append((time.perf_counter() - started) * 1000)
+            # 500 - в том числе таймаут ожидания соединения из пула
+            if status not in (200, 400):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    new_sum, new_count = hold_totals()
+    requests = new_count - hold_count
+    return {
+        "hold_ms": (new_sum - hold_sum) / max(requests, 1) * 1000,
+        "hold_total_s": new_sum - hold_sum,
+        "peak": occupancy.peak,
+        "p50_ms": statistics.median(latencies),
+        "errors": errors,
+        "rps": args.requests / elapsed,
+    }
+
+
+async def main(args) -> None:
+    engine = AsyncSessionLocal.kw["bind"].sync_engine if settings.database_async else SessionLocal.kw["bind"]
+    occupancy = Occupancy(engine)
+
+    password_hash = AuthService.get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email == EMAIL))
+        db.add(User(name="Benchmark", email=EMAIL, password=password_hash))
+        db.commit()
+
+    try:
+        print(f"requests={args.requests} concurrency={args.concurrency} invalid={args.invalid}")
+        for mode in ("legacy", "lazy"):
+            result = await run(mode, args, occupancy)
+            print(
+                f"{mode:>6}: hold/request={result['hold_ms']:7.2f}ms  hold_total={result['hold_total_s']:6.2f}s  "
+                f"peak_connections={result['peak']:3d}  p50={result['p50_ms']:7.1f}ms  {result['rps']:7.1f} req/s  errors={result['errors']}"
+            )
+    finally:
+        app.dependency_overrides.clear()
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.email == EMAIL))
+            db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--invalid", type=float, default=0.5, help="доля запросов с неверным CSRF")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+# benchmarks/db_latency.py
+"""
+Задержка запроса пользователя по email через get_async_db при N конкурентных
+клиентах: синхронный PyMySQL (SyncSessionAdapter) против асинхронного драйвера.
+
+    python -m benchmarks.db_latency --clients 32 --requests 2000 --email admin@gmail.com
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from config.app import settings
+import config.database as database
+from app.Models.User import User
+
+
+async def _run(mode: str, clients: int, requests: int, email: str) -> dict:
+    settings.database_async = mode == "async"
+    remaining = requests
+    latencies: list = []
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            sessions = database.get_async_db()
+            db = await sessions.__anext__()
+            try:
+                (await db.execute(select(User).filter_by(email=email))).scalars().first()
+            finally:
+                await sessions.aclose()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main(args) -> None:
+    if database.async_engine is None:
+        database.async_engine = create_async_engine(database.ASYNC_DATABASE_URL)
+        database.AsyncSessionLocal.configure(bind=database.async_engine)
+
+    for mode in args.modes:
+        result = await _run(mode, args.clients, args.requests, args.email)
+        print(
+            f"{result['mode']:>5}: {result['rps']:8.1f} req/s  "
+            f"p50={result['p50_ms']:7.2f}ms  p99={result['p99_ms']:7.2f}ms"
+        )
+
+    await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--email", default="admin@gmail.com")
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,175 @@
+# benchmarks/login_dns_latency.py
+"""
+Задержка POST /auth/login при медленном DNS. Вместо сети используется
+локальная заглушка резолвера, которая отвечает MX-записью через --dns-delay
+секунд. Сравниваются режимы:
+
+    legacy   - validate_email с DNS прямо в event loop, как было до ValidationService
+    always   - DNS в потоке без кеша; одновременные запросы делят один DNS-запрос
+    cached   - DNS в потоке с кешем доставляемости по домену
+    hot-skip - на входе DNS не проверяется (email_check_deliverability_hot_paths=False)
+
+Запросы подаются напрямую в ASGI-приложение, пользователь не существует,
+поэтому bcrypt не участвует. Нужна настроенная БД приложения.
+
+    python -m benchmarks.login_dns_latency --dns-delay 0.5 --requests 50 --concurrency 10
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from email_validator import validate_email, EmailNotValidError
+from app.main import app
+from app.Services.ValidationService import ValidationService
+from config.app import settings
+
+NORMALIZE_EMAIL = ValidationService.__dict__["normalize_email"]
+TOKEN_PATTERN = re.compile(rb'<meta name="csrf-token" content="([^"]+)"')
+
+
+class SlowResolver:
+    """Заглушка dns.resolver.Resolver: каждый запрос ждет delay секунд"""
+
+    class _MX:
+        preference = 10
+        exchange = "mx.example.com."
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.queries = 0
+
+    def resolve(self, domain, rdtype):
+        self.queries += 1
+        time.sleep(self.delay)
+        if rdtype == "MX":
+            return [self._MX()]
+        raise AssertionError(f"unexpected {rdtype} query")
+
+
+async def call(method: str, path: str, headers: list, body: bytes, client_ip: str) -> tuple:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")] + headers,
+        # Отдельный адрес на запрос, чтобы не упираться в rate limit входа
+        "client": (client_ip, 50000),
+        "server": ("localhost", 8000),
+    }
+    status = 0
+    response_headers = []
+    chunks = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message["headers"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+async def login_form() -> tuple:
+    """Cookie сессии и CSRF-токен со страницы входа"""
+    status, headers, body = await call("GET", "/login", [], b"", "10.0.0.1")
+    if status != 200:
+        raise SystemExit(f"/login: HTTP {status}")
+    cookie = next((value.split(b";")[0] for name, value in headers if name == b"set-cookie"), None)
+    token = TOKEN_PATTERN.search(body).group(1).decode()
+    return cookie, token
+
+
+def legacy_normalize_email(resolver: SlowResolver):
+    async def normalize_email(email: str, check_deliverability: bool = False):
+        try:
+            return validate_email(email, check_deliverability=True, dns_resolver=resolver).normalized
+        except EmailNotValidError:
+            return None
+    return normalize_email
+
+
+async def run(mode: str, args, resolver: SlowResolver) -> list:
+    if mode == "legacy":
+        ValidationService.normalize_email = legacy_normalize_email(resolver)
+    else:
+        ValidationService.normalize_email = NORMALIZE_EMAIL
+    settings.email_check_deliverability_hot_paths = mode != "hot-skip"
+    settings.email_dns_cache_ttl = 0 if mode == "always" else 3600
+    settings.email_dns_negative_ttl = 0 if mode == "always" else 300
+    ValidationService.clear_cache()
+
+    cookie, token = await login_form()
+    headers = [(b"content-type", b"application/x-www-form-urlencoded")]
+    if cookie:
+        headers.append((b"cookie", cookie))
+    body = urllib.parse.urlencode({
+        "csrf_token": token,
+        "login": "nobody@slow-dns.example",
+        "password": "Benchmark-Passw0rd!",
+    }).encode()
+
+    latencies = []
+    counter = 0
+
+    async def client():
+        nonlocal counter
+        while counter < args.requests:
+            counter += 1
+            ip = f"10.{counter // 65536 % 256}.{counter // 256 % 256}.{counter % 256}"
+            started = time.perf_counter()
+            status, _, response = await call("POST", "/auth/login", headers, body, ip)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status != 401:
+                raise SystemExit(f"/auth/login: HTTP {status} {response[:200]!r}")
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return latencies
+
+
+async def main(args) -> None:
+    resolver = SlowResolver(args.dns_delay)
+    ValidationService.resolver = resolver
+
+    print(f"dns_delay={args.dns_delay}s requests={args.requests} concurrency={args.concurrency}")
+    for mode in ("legacy", "always", "cached", "hot-skip"):
+        resolver.queries = 0
+        started = time.perf_counter()
+        latencies = sorted(await run(mode, args, resolver))
+        elapsed = time.perf_counter() - started
+        print(
+            f"{mode:>8}: p50={statistics.median(latencies):8.1f}ms  "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1]:8.1f}ms  "
+            f"max={latencies[-1]:8.1f}ms  total={elapsed:6.2f}s  dns_queries={resolver.queries}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dns-delay", type=float, default=0.5)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+# benchmarks/login_throughput.py
+"""
+Пропускная способность логина при N конкурентных клиентах: bcrypt в event loop
+(sync) против bcrypt в пуле исполнителей (async).
+
+    python -m benchmarks.login_throughput --clients 16 --requests 64 --executor process
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.app import settings
+from app.Services.AuthService import AuthService
+
+PASSWORD = "Benchmark-Password1!"
+
+
+async def _heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.01):
+    # Задержка event loop: насколько позже запланированного просыпается корутина
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def _run(mode: str, clients: int, requests: int, password_hash: str) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    latencies: list = []
+
+    async def client():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            await asyncio.sleep(0)  # имитация чтения тела и запроса к БД
+            if mode == "sync":
+                AuthService.verify_password(PASSWORD, password_hash)
+            else:
+                await AuthService.verify_password_async(PASSWORD, password_hash)
+            latencies.append(time.perf_counter() - started)
+
+    lags: list = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_loop_lag_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+async def main(args) -> None:
+    settings.auth_hash_executor = args.executor
+    settings.auth_hash_workers = args.workers
+
+    password_hash = AuthService.get_password_hash(PASSWORD)
+
+    # Прогрев пула: стоимость fork/spawn не должна попадать в замер
+    started = time.perf_counter()
+    await AuthService.verify_password_async(PASSWORD, password_hash)
+    print(f"executor={args.executor} warmup={(time.perf_counter() - started) * 1000:.1f}ms")
+
+    for mode in ("sync", "async"):
+        result = await _run(mode, args.clients, args.requests, password_hash)
+        print(
+            f"{result['mode']:>5}: {result['rps']:7.2f} req/s  "
+            f"p50={result['p50_ms']:8.1f}ms  p99={result['p99_ms']:8.1f}ms  "
+            f"max loop lag={result['max_loop_lag_ms']:8.1f}ms"
+        )
+
+    AuthService.shutdown_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--workers", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+# benchmarks/smtp_throughput.py
+"""
+Писем в секунду: новое SMTP-соединение на каждое письмо (прежнее поведение
+EmailService) против SmtpConnectionPool.send_many. Сервер - локальный aiosmtpd
+(pip install aiosmtpd), без TLS, AUTH принимает любые учетные данные.
+
+    python -m benchmarks.smtp_throughput --messages 500 --connections 4
+"""
+import argparse
+import smtplib
+import sys
+import time
+from email.mime.text import MIMEText
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from app.Services.SmtpPool import SmtpConnectionPool
+
+HOST = "127.0.0.1"
+
+
+class _Sink:
+    received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        _Sink.received += 1
+        return "250 OK"
+
+
+def _accept_any(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def _messages(count: int):
+    messages = []
+    for i in range(count):
+        msg = MIMEText(f"<p>Сообщение {i}</p>", "html")
+        msg["From"] = "bench@localhost"
+        msg["To"] = f"user{i}@localhost"
+        msg["Subject"] = "benchmark"
+        messages.append(msg)
+    return messages
+
+
+def per_message(port: int, messages) -> None:
+    for msg in messages:
+        with smtplib.SMTP(HOST, port, timeout=10) as server:
+            server.login("bench", "bench")
+            server.send_message(msg)
+
+
+def pooled(port: int, messages, connections: int) -> None:
+    pool = SmtpConnectionPool(HOST, port, "bench", "bench", encryption="none", max_size=connections)
+    errors = [error for error in pool.send_many(messages) if error is not None]
+    pool.close()
+    if errors:
+        raise errors[0]
+
+
+def main(args) -> None:
+    controller = Controller(_Sink(), hostname=HOST, port=args.port, authenticator=_accept_any, auth_require_tls=False)
+    controller.start()
+    try:
+        messages = _messages(args.messages)
+        for name, run in (
+            ("per-message connection", lambda: per_message(args.port, messages)),
+            (f"pool x{args.connections}", lambda: pooled(args.port, messages, args.connections)),
+        ):
+            _Sink.received = 0
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            print(f"{name:>24}: {_Sink.received / elapsed:8.1f} msg/s ({_Sink.received} in {elapsed:.2f}s)")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8025)
+    main(parser.parse_args())
@@ -0,0 +1,119 @@
+# benchmarks/static_throughput.py
+"""
+Запросы к /static в секунду через стек middleware приложения: подписанная
+cookie-сессия Starlette (как было), серверная сессия на всех путях и
+серверная сессия с обходом stateless_paths. Запросы подаются напрямую в
+ASGI-приложение, без сети и HTTP-сервера.
+
+    python -m benchmarks.static_throughput --requests 5000 --concurrency 16 --path /static/css/styles.css
+"""
+import argparse
+import asyncio
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from itsdangerous import TimestampSigner
+from starlette.middleware.sessions import SessionMiddleware as CookieSessionMiddleware
+from app.Middleware.path_scope import PathScopedMiddleware
+from app.Middleware.rate_limit import RateLimitMiddleware
+from app.Middleware.session import SessionMiddleware
+from app.Services.SessionService import CachedSessionStore, MemorySessionStore, SessionService
+from config import route
+
+SECRET = "benchmark-secret-key-benchmark-secret-key"
+SESSION = {"csrf_token": "0" * 64, "user_id": 1, "user_name": "Benchmark", "user_email": "bench@example.com"}
+
+
+def build_app(mode: str, store: CachedSessionStore) -> FastAPI:
+    app = FastAPI()
+    exclude = route.stateless_paths if mode == "bypass" else []
+    app.add_middleware(PathScopedMiddleware, middleware=RateLimitMiddleware, exclude=exclude, rules=route.rate_limits)
+    if mode == "cookie":
+        app.add_middleware(CookieSessionMiddleware, secret_key=SECRET, session_cookie="session")
+    else:
+        app.add_middleware(PathScopedMiddleware, middleware=SessionMiddleware, exclude=exclude, store=store)
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    return app
+
+
+def session_cookie(mode: str, store: CachedSessionStore) -> bytes:
+    # Браузер отправляет cookie сессии и с запросами к статике
+    if mode == "cookie":
+        data = base64.b64encode(json.dumps(SESSION).encode())
+        return TimestampSigner(SECRET).sign(data)
+    session_id = SessionService.generate_id()
+    store.save(session_id, SESSION)
+    return session_id.encode()
+
+
+async def request(app: FastAPI, path: str, cookie: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"cookie", b"session=" + cookie)],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(mode: str, path: str, requests: int, concurrency: int) -> float:
+    store = CachedSessionStore(MemorySessionStore(1000, 3600), 1000)
+    app = build_app(mode, store)
+    cookie = session_cookie(mode, store)
+
+    status = await request(app, path, cookie)
+    if status != 200:
+        raise SystemExit(f"{path}: HTTP {status}")
+
+    remaining = requests
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await request(app, path, cookie)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args) -> None:
+    print(f"path={args.path} requests={args.requests} concurrency={args.concurrency}")
+    for mode in ("cookie", "server", "bypass"):
+        rps = await run(mode, args.path, args.requests, args.concurrency)
+        print(f"{mode:>6}: {rps:9.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/static/css/styles.css")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+# benchmarks/template_cold_start.py
+"""
+Задержка первого рендера каждого шаблона в только что запущенном воркере:
+без кеша байткода, с пустым кешем (первый запуск после деплоя без
+templates:compile) и с кешем, заполненным craft templates:compile. Каждый
+режим запускается в отдельном процессе, как новый воркер.
+
+    python -m benchmarks.template_cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+VIEWS = ["auth/auth.html", "home/index.html", "main/index.html", "test/index.html"]
+CONTEXT = {"user_name": "Гость", "csrf_token": "0" * 64, "title": "Benchmark"}
+
+
+def child(cache_dir: str) -> None:
+    # Запускается в новом процессе: ни одного скомпилированного шаблона в памяти
+    from config.templates import create_environment
+
+    env = create_environment(cache_dir or None)
+    timings = {}
+    for name in VIEWS:
+        started = time.perf_counter()
+        env.get_template(name).render(CONTEXT)
+        timings[name] = (time.perf_counter() - started) * 1000
+    print(json.dumps(timings))
+
+
+def run_child(cache_dir: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.template_cold_start", "--child", cache_dir],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def precompile(cache_dir: str) -> None:
+    from config.templates import create_environment
+
+    env = create_environment(cache_dir)
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+
+
+def main(args) -> None:
+    results = {"no cache": [], "empty cache": [], "compiled": []}
+    for _ in range(args.runs):
+        results["no cache"].append(run_child(""))
+
+        cache_dir = tempfile.mkdtemp(prefix="templates-bench-")
+        try:
+            results["empty cache"].append(run_child(cache_dir))
+            shutil.rmtree(cache_dir)
+            os.makedirs(cache_dir)
+            precompile(cache_dir)
+            results["compiled"].append(run_child(cache_dir))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"median first render, ms ({args.runs} cold processes per mode)")
+    print(f"{'view':<20}" + "".join(f"{mode:>14}" for mode in results))
+    for name in VIEWS:
+        row = "".join(f"{statistics.median(run[name] for run in runs):14.2f}" for runs in results.values())
+        print(f"{name:<20}{row}")
+    totals = "".join(f"{statistics.median(sum(run.values()) for run in runs):14.2f}" for runs in results.values())
+    print(f"{'total':<20}{totals}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", default=None)
+    parsed = parser.parse_args()
+    if parsed.child is not None:
+        child(parsed.child)
+    else:
+        main(parsed)
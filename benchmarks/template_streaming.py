@@ -0,0 +1,120 @@
+# benchmarks/template_streaming.py
+"""
+TTFB, полное время ответа и пиковая память для большой страницы на
+layouts/head.html: TemplateResponse (рендер всей страницы в строку) против
+StreamingTemplateResponse. Ответ собирается напрямую через ASGI-интерфейс,
+без сети; память меряется tracemalloc.
+
+    python -m benchmarks.template_streaming --rows 20000 --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from jinja2 import ChoiceLoader, DictLoader
+from starlette.requests import Request
+from config.templates import streaming_templates, templates
+from app.Services.StreamingTemplateResponse import StreamingTemplateResponse
+
+# Страница в общем layout: тело растет с числом строк, head остается тем же
+PAGE = """{% extends "layouts/head.html" %}
+{% block content %}
+<table class="table">
+{% for row in rows %}
+    <tr><td>{{ row.id }}</td><td>{{ row.name }}</td><td>{{ row.email }}</td><td>{{ row.note }}</td></tr>
+{% endfor %}
+</table>
+{% endblock %}"""
+PAGE_NAME = "benchmark/large.html"
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/benchmark",
+        "raw_path": b"/benchmark",
+        "root_path": "",
+        "scheme": "http",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def measure(mode: str, rows: list, trace_memory: bool = False) -> dict:
+    scope = make_scope()
+    context = {"request": Request(scope), "rows": rows}
+    first_body_at = None
+    total_bytes = 0
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal first_body_at, total_bytes
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_body_at is None:
+                first_body_at = time.perf_counter()
+            total_bytes += len(message["body"])
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "buffered":
+        response = templates.TemplateResponse(PAGE_NAME, context)
+    else:
+        response = StreamingTemplateResponse(PAGE_NAME, context)
+    await response(scope, receive, send)
+    finished = time.perf_counter()
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "ttfb_ms": (first_body_at - started) * 1000,
+        "total_ms": (finished - started) * 1000,
+        "peak_mb": peak / 1024 / 1024,
+        "bytes": total_bytes,
+    }
+
+
+async def main(args) -> None:
+    for env in (templates.env, streaming_templates.env):
+        env.loader = ChoiceLoader([DictLoader({PAGE_NAME: PAGE}), env.loader])
+
+    rows = [
+        {"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "note": "<b>escaped</b> " * 4}
+        for i in range(args.rows)
+    ]
+
+    # Прогрев: компиляция шаблонов не должна попадать в замер
+    for mode in ("buffered", "streaming"):
+        await measure(mode, rows[:10])
+
+    print(f"rows={args.rows} runs={args.runs}")
+    for mode in ("buffered", "streaming"):
+        results = [await measure(mode, rows) for _ in range(args.runs)]
+        # tracemalloc замедляет рендер в разы, поэтому память меряется отдельным прогоном
+        memory = await measure(mode, rows, trace_memory=True)
+        print(
+            f"{mode:>9}: ttfb={statistics.median(r['ttfb_ms'] for r in results):8.2f}ms  "
+            f"total={statistics.median(r['total_ms'] for r in results):8.2f}ms  "
+            f"peak={memory['peak_mb']:7.2f}MB  "
+            f"size={results[0]['bytes'] / 1024:.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -1,4 +1,5 @@
 # config/app.py
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -17,6 +18,20 @@ class Settings(BaseSettings):
     database_host: str = "localhost"
     database_port: int = 3306
     database_name: str = "test_db"
+    database_async: bool = False  # True: asyncio-драйвер, False: синхронный PyMySQL
+    database_async_driver: str = "aiomysql"  # aiomysql | asyncmy
+
+    # Пул соединений
+    database_pool_size: int = 10
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 10.0  # секунды ожидания свободного соединения
+    database_pool_recycle: int = 1800  # пересоздавать соединения старше N секунд (< wait_timeout MySQL)
+    database_pool_pre_ping: str = "optimistic"  # always | optimistic
+    database_pool_warmup: bool = True  # открыть pool_size соединений при старте
+
+    # Реплики для чтения (URL через запятую) и время исключения недоступной реплики
+    database_replica_urls: str = ""
+    database_replica_retry_after: float = 30.0
 
     # Настройки почты
     mail_host: str = "smtp.mail.ru"
@@ -26,6 +41,73 @@ class Settings(BaseSettings):
     mail_encryption: str = ""
     mail_from_address: str = ""
 
+    # Настройки хеширования паролей (bcrypt вне event loop)
+    auth_hash_executor: str = "process"  # process | thread
+    auth_hash_workers: int = 0  # 0 = по числу ядер
+    password_history_depth: int = 5  # сколько последних паролей хранить и проверять
+
+    # Rate limiting
+    rate_limit_backend: str = "shared"  # shared (mmap, общий для воркеров) | memory
+    rate_limit_table_path: str = "storage/framework/rate_limit.bin"
+    rate_limit_table_slots: int = 65536
+
+    # Сессии: в cookie только id, данные на сервере
+    session_driver: str = "file"  # file | database | memory (только один воркер)
+    session_lifetime: int = 60 * 60 * 24 * 7  # секунды с последней активности (скользящий срок)
+    session_touch_interval: int = 15 * 60  # продление сессии без изменений не чаще раза в N секунд
+    session_cookie: str = "session"
+    session_files_path: str = "storage/framework/sessions"
+    session_cache_size: int = 10000  # сессий в LRU воркера
+    session_gc_probability: float = 0.01  # доля записей, после которых удаляются истекшие сессии
+
+    # CSRF: stateless - подписанные токены без записи в сессию, session - токен хранится в сессии
+    csrf_mode: str = "stateless"  # stateless | session
+    csrf_token_lifetime: int = 2 * 60 * 60  # секунды действия подписанного токена
+
+    # Кеш статики в памяти воркера
+    static_cache_max_bytes: int = 64 * 1024 * 1024  # LRU-бюджет на содержимое файлов
+    static_cache_max_file_size: int = 1024 * 1024  # файлы крупнее отдаются с диска частями
+    static_cache_check_interval: float = 2.0  # секунды между проверками файла через stat
+
+    # Разбор тела запроса
+    request_max_body_size: int = 1024 * 1024  # байт; при превышении ответ 413 без чтения остатка
+
+    # Проверка email: DNS-запрос доставляемости только при регистрации, результаты кешируются по домену
+    email_check_deliverability: bool = True  # False - только синтаксис
+    email_check_deliverability_hot_paths: bool = False  # DNS также при входе и восстановлении пароля
+    email_dns_timeout: float = 2.0  # секунды на DNS-запрос
+    email_dns_cache_ttl: int = 60 * 60  # кеш доставляемого домена
+    email_dns_negative_ttl: int = 5 * 60  # кеш недоставляемого домена и таймаута резолвера
+    email_dns_cache_size: int = 10000
+
+    # Замер фаз запроса: гистограммы по маршрутам собираются всегда, заголовок - по настройке.
+    # Server-Timing раскрывает клиенту тайминги (например, bcrypt выдает наличие пользователя)
+    server_timing_header: bool = False
+
+    # Учет SQL по запросам (app/Services/QueryMonitor.py)
+    sql_monitor: bool = True
+    sql_slow_query_threshold: float = 0.5  # секунды; медленные запросы пишутся в storage/logs/slow_queries.log
+    sql_request_query_threshold: int = 20  # предупреждение, если запрос выполнил больше statement-ов
+    sql_repeat_threshold: int = 5  # одинаковый statement столько раз за запрос - вероятный N+1
+
+    # /metrics (Prometheus): каждый воркер пишет снимок метрик в metrics_path, ответ суммирует все снимки
+    metrics_enabled: bool = True
+    metrics_path: str = "storage/framework/metrics"
+    metrics_flush_interval: float = 5.0  # секунды между записями снимка воркера
+    metrics_worker_ttl: int = 60 * 60  # снимок, не обновлявшийся N секунд, переносится в retired.json
+    metrics_token: str = ""  # Authorization: Bearer <token>; в production без токена /metrics отключен
+
+    # Логирование (config/logging.py): запись в файл фоновым потоком пачками; при переполнении
+    # очереди (диск не успевает) записи отбрасываются, запрос не ждет
+    log_format: str = "verbose"  # verbose | json
+    log_max_bytes: int = 50 * 1024 * 1024  # ротация по размеру (0 - выключена)
+    log_rotate_interval: int = 24 * 60 * 60  # ротация по времени, секунды (86400 - в полночь UTC, 0 - выключена)
+    log_backup_count: int = 14  # сколько архивных файлов хранить
+    log_queue_size: int = 10000
+    log_batch_size: int = 500
+    # Доля сохраняемых записей уровня до WARNING включительно от шумных логгеров (JSON в .env)
+    log_sample_rates: Dict[str, float] = {"app.Services.RequestParser": 0.1}
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,9 +1,15 @@
 # config/database.py
 
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
+from .app import settings
+from . import pool
+from .routing import ReplicaSet, RoutingSession
 import os
 
 load_dotenv()
@@ -14,19 +20,68 @@ def _require_env(name: str) -> str:
         raise RuntimeError(f"Environment variable {name} must be set")
     return value
 
-database_user = _require_env("database_user")
-database_password = _require_env("database_password")
-database_host = _require_env("database_host")
-database_port = _require_env("database_port")
-database_name = _require_env("database_name")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
-if database_user == "root" and not database_password:
-    raise RuntimeError("Database password must not be empty for user 'root'")
+def _async_url(url: str) -> str:
+    """URL для асинхронного драйвера: mysql+pymysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = settings.database_async_driver if backend == "mysql" else ASYNC_DRIVERS.get(backend, parsed.get_driver_name())
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
 
-DATABASE_URL = f"mysql+pymysql://{database_user}:{database_password}@{database_host}:{database_port}/{database_name}"
+# database_url целиком заменяет параметры database_* (например, sqlite:///storage/primary.db локально)
+DATABASE_URL = os.getenv("database_url", "")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if not DATABASE_URL:
+    database_user = _require_env("database_user")
+    database_password = _require_env("database_password")
+    database_host = _require_env("database_host")
+    database_port = _require_env("database_port")
+    database_name = _require_env("database_name")
+
+    if database_user == "root" and not database_password:
+        raise RuntimeError("Database password must not be empty for user 'root'")
+
+    DATABASE_URL = f"mysql+pymysql://{database_user}:{database_password}@{database_host}:{database_port}/{database_name}"
+
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+
+# Реплики для чтения: database_replica_urls через запятую
+REPLICA_URLS = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+
+engine = create_engine(DATABASE_URL, **pool.engine_options("primary"))
+pool.register("primary", engine)
+
+replica_engines = []
+for index, url in enumerate(REPLICA_URLS):
+    replica_engines.append(create_engine(url, **pool.engine_options(f"replica{index}")))
+    pool.register(f"replica{index}", replica_engines[-1])
+replicas = ReplicaSet(replica_engines, settings.database_replica_retry_after) if replica_engines else None
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas)
+
+# Асинхронный движок создается только при database_async, чтобы драйвер не был обязательной зависимостью
+async_engine = None
+async_replicas = None
+if settings.database_async:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool.engine_options("primary_async", is_async=True))
+    pool.register("primary_async", async_engine)
+
+    async_replica_engines = []
+    for index, url in enumerate(REPLICA_URLS):
+        async_replica_engines.append(
+            create_async_engine(_async_url(url), **pool.engine_options(f"replica{index}_async", is_async=True))
+        )
+        pool.register(f"replica{index}_async", async_replica_engines[-1])
+    async_replicas = ReplicaSet(async_replica_engines, settings.database_replica_retry_after) if async_replica_engines else None
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    replicas=async_replicas,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 Base = declarative_base()
 
@@ -35,4 +90,123 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class SyncSessionAdapter:
+    """Синхронная Session с интерфейсом AsyncSession (запросы по-прежнему блокируют event loop)"""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return self.sync_session.scalar(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        self.sync_session.delete(instance)
+
+    async def flush(self, objects=None) -> None:
+        self.sync_session.flush(objects)
+
+    async def refresh(self, instance, attribute_names=None) -> None:
+        self.sync_session.refresh(instance, attribute_names)
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def close(self) -> None:
+        self.sync_session.close()
+
+
+def _new_async_db():
+    """AsyncSession или SyncSessionAdapter по настройке database_async"""
+    if settings.database_async:
+        return AsyncSessionLocal()
+    return SyncSessionAdapter(SessionLocal())
+
+
+class LazyDbSession:
+    """Сессия запроса с интерфейсом AsyncSession, которая создается при первом обращении к БД.
+
+    Запросы, отклоненные до первого запроса к БД (CSRF, валидация), соединение
+    из пула не берут. После commit/rollback соединение уже возвращено в пул;
+    release() возвращает его и после одних чтений, например перед bcrypt.
+    """
+
+    def __init__(self, factory=_new_async_db):
+        self._factory = factory
+        self._session = None
+
+    def _get(self):
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def add(self, instance) -> None:
+        self._get().add(instance)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._get().execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await self._get().scalar(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._get().get(entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await self._get().delete(instance)
+
+    async def flush(self, objects=None) -> None:
+        await self._get().flush(objects)
+
+    async def refresh(self, instance, attribute_names=None) -> None:
+        await self._get().refresh(instance, attribute_names)
+
+    async def commit(self) -> None:
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self) -> None:
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def release(self) -> None:
+        """Закрыть сессию и вернуть соединение в пул. Загруженные атрибуты объектов остаются
+        доступны, несохраненные изменения теряются; следующий запрос откроет новую сессию"""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def close(self) -> None:
+        await self.release()
+
+
+async def get_async_db(request: Request):
+    """Ленивая сессия для async-контроллеров; время удержания соединений запросом попадает в pool.request_hold,
+    запросы к БД - в QueryMonitor"""
+    # Импорт при вызове: QueryMonitor читает config.app, а пакет config импортирует этот модуль
+    from app.Services.QueryMonitor import QueryMonitor
+
+    db = LazyDbSession()
+    hold_token = pool.track_request()
+    route = request.scope.get("route")
+    queries_token = QueryMonitor.start(route.path if route is not None else "unmatched")
+    try:
+        yield db
+    finally:
+        await db.close()
+        pool.finish_request(hold_token)
+        QueryMonitor.finish(queries_token)
@@ -1,10 +1,316 @@
+import copy
 import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
 from pathlib import Path
+from typing import Dict, List, Optional
+from app.Services.JsonService import JsonService
+from app.Services.MetricsService import Counter
 from .app import settings
 
+try:
+    import fcntl
+except ImportError:  # Windows: ротация согласуется только внутри процесса
+    fcntl = None
+
 LOG_DIR = Path("storage/logs")
 LOG_DIR.mkdir(exist_ok=True)
 
+# Атрибуты LogRecord; остальные (logger.info(..., extra={...})) попадают в JSON как поля
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время UTC, уровень, логгер, сообщение, traceback и поля extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return JsonService.dumps(entry).decode("utf-8")
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей не выше max_level от шумных логгеров.
+
+    rates: {имя логгера: доля}; правило действует и на дочерние логгеры.
+    Записи выше max_level (по умолчанию ERROR и CRITICAL) проходят всегда.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, max_level: str = "WARNING"):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.max_level = logging.getLevelName(max_level)
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class BatchRotatingFileHandler(logging.FileHandler):
+    """Файловый handler с записью пачкой и ротацией по размеру и по времени.
+
+    Ротация по времени - на границах интервала rotate_interval от начала эпохи
+    (86400 - полночь UTC): файл, последний раз измененный в прошлом интервале,
+    переименовывается перед первой записью в новом. Архивы получают суффикс
+    времени ротации, хранятся последние backup_count. Несколько воркеров
+    пишут в один файл: ротацию выполняет один (flock), остальные
+    переоткрывают файл, заметив смену inode.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+        backup_count: int = 0,
+        encoding: str = "utf-8",
+        delay: bool = False
+    ):
+        super().__init__(filename, "a", encoding, delay)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emit_batch([record])
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            if record.levelno < self.level or not self.filter(record):
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        with self.lock:
+            self._rotate_if_needed()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            path_stat = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            path_stat = None
+        if self.stream is not None and (path_stat is None or not os.path.samestat(path_stat, os.fstat(self.stream.fileno()))):
+            # Файл уже ротирован другим воркером
+            self._reopen()
+            return
+        if path_stat is None or not self._should_rotate(path_stat):
+            return
+
+        with open(self.baseFilename + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.baseFilename)
+            except FileNotFoundError:
+                current = None
+            # Под блокировкой: если другой воркер успел ротировать, файл уже новый
+            if current is not None and os.path.samestat(current, path_stat):
+                if self.stream is not None:
+                    self.stream.close()
+                    self.stream = None
+                try:
+                    os.rename(self.baseFilename, self._backup_name())
+                    self._remove_old_backups()
+                except OSError as e:
+                    sys.stderr.write(f"Log rotation of {self.baseFilename} failed: {e}\n")
+        self._reopen()
+
+    def _should_rotate(self, path_stat: os.stat_result) -> bool:
+        if self.max_bytes and path_stat.st_size >= self.max_bytes:
+            return True
+        if self.rotate_interval:
+            period_start = time.time() // self.rotate_interval * self.rotate_interval
+            return path_stat.st_size > 0 and path_stat.st_mtime < period_start
+        return False
+
+    def _backup_name(self) -> str:
+        name = f"{self.baseFilename}.{time.strftime('%Y-%m-%d_%H-%M-%S')}"
+        candidate, index = name, 1
+        while os.path.exists(candidate):
+            candidate = f"{name}.{index}"
+            index += 1
+        return candidate
+
+    def _remove_old_backups(self) -> None:
+        if not self.backup_count:
+            return
+        directory, base = os.path.split(self.baseFilename)
+        backups = sorted(
+            (entry for entry in os.scandir(directory or ".") if entry.name.startswith(base + ".") and not entry.name.endswith(".lock")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in backups[:-self.backup_count]:
+            os.remove(entry.path)
+
+    def _reopen(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self._open()
+
+
+_STOP = object()
+
+
+class BatchingQueueHandler(QueueHandler):
+    """Запись логов без блокировки вызывающего потока.
+
+    emit только кладет запись в ограниченную очередь; форматирование (включая
+    traceback) и запись в файл выполняет фоновый поток, забирая из очереди все
+    накопившиеся записи (до batch_size) и записывая их одним write. Если диск
+    не успевает и очередь заполнена, запись отбрасывается и учитывается в dropped.
+    """
+
+    instances: List["BatchingQueueHandler"] = []
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+        backup_count: int = 0,
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        delay: bool = False
+    ):
+        super().__init__(queue.Queue(queue_size))
+        self.target = BatchRotatingFileHandler(filename, max_bytes, rotate_interval, backup_count, delay=delay)
+        self.batch_size = batch_size
+        self.dropped = Counter()
+        self._reported = 0
+        self._start()
+        BatchingQueueHandler.instances.append(self)
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"log-{Path(self.target.baseFilename).name}", daemon=True)
+        self._thread.start()
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        # Форматирует фоновый поток
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение фиксируется сразу (аргументы могут измениться), exc_info форматируется в фоновом потоке
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+            stop = record is _STOP
+            batch = [] if stop else [record]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                else:
+                    batch.append(record)
+
+            dropped = self.dropped.value
+            if dropped > self._reported:
+                batch.append(logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    f"{dropped - self._reported} log records dropped: queue full or write failed", None, None
+                ))
+                self._reported = dropped
+            if batch:
+                try:
+                    self.target.emit_batch(batch)
+                except Exception:
+                    # Диск недоступен: записи теряются, но поток записи продолжает работать
+                    self.dropped.inc(len(batch))
+                    self._reported = self.dropped.value
+            if stop:
+                return
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    def _after_fork(self) -> None:
+        # В дочернем процессе (fork с preload) фонового потока нет
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._start()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            try:
+                # Дописывает очередь; при зависшем диске ждет не дольше секунды
+                self.queue.put(_STOP, timeout=1.0)
+                self._thread.join(5.0)
+            except queue.Full:
+                pass
+        self.target.close()
+        if self in BatchingQueueHandler.instances:
+            BatchingQueueHandler.instances.remove(self)
+        super().close()
+
+
+def _restart_after_fork() -> None:
+    for handler in BatchingQueueHandler.instances:
+        handler._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+LOG_LEVEL = "DEBUG" if settings.debug else "INFO"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -13,17 +319,53 @@ LOGGING = {
             "format": "{levelname} {asctime} {module} {message}",
             "style": "{",
         },
+        "json": {
+            "()": JsonFormatter,
+        },
+    },
+    "filters": {
+        "sampling": {
+            "()": SamplingFilter,
+            "rates": settings.log_sample_rates,
+        },
     },
     "handlers": {
         "file": {
-            "level": "DEBUG" if settings.debug else "INFO",
-            "class": "logging.FileHandler",
-            "filename": LOG_DIR / "app.log",
-            "formatter": "verbose",
+            "()": BatchingQueueHandler,
+            "level": LOG_LEVEL,
+            "filename": str(LOG_DIR / "app.log"),
+            "max_bytes": settings.log_max_bytes,
+            "rotate_interval": settings.log_rotate_interval,
+            "backup_count": settings.log_backup_count,
+            "queue_size": settings.log_queue_size,
+            "batch_size": settings.log_batch_size,
+            "formatter": settings.log_format,
+            "filters": ["sampling"],
+        },
+        "slow_queries": {
+            "()": BatchingQueueHandler,
+            "level": "WARNING",
+            "filename": str(LOG_DIR / "slow_queries.log"),
+            "max_bytes": settings.log_max_bytes,
+            "rotate_interval": settings.log_rotate_interval,
+            "backup_count": settings.log_backup_count,
+            "queue_size": settings.log_queue_size,
+            "batch_size": settings.log_batch_size,
+            "formatter": settings.log_format,
+            # Файл создается при первом медленном запросе
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "sql.slow": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
         },
     },
     "root": {
         "handlers": ["file"],
-        "level": "DEBUG",
+        # Уровень как у handler: logger.debug(...) без debug не создает запись
+        "level": LOG_LEVEL,
     },
-}
\ No newline at end of file
+}
@@ -33,6 +33,18 @@ mailEncryption = get_env_str("mailEncryption", "ssl")
 mailFromAddress = get_env_str("mailFromAddress", "")
 mailFromName = get_env_str("mailFromName", get_env_str("mailFromName", "TitanCore Framework"))
 
+# Фоновая отправка (EmailDispatcher)
+mailTimeout = get_env_int("mailTimeout", 10)  # таймаут SMTP-операций, секунды
+mailQueueSize = get_env_int("mailQueueSize", 1000)
+mailWorkers = get_env_int("mailWorkers", 2)
+mailMaxRetries = get_env_int("mailMaxRetries", 3)
+mailRetryBackoff = get_env_int("mailRetryBackoff", 2)  # задержка перед повтором: backoff * 2^попытка
+
+# Пул SMTP-соединений
+mailPoolSize = get_env_int("mailPoolSize", 4)
+mailPoolIdleCheck = get_env_int("mailPoolIdleCheck", 30)  # NOOP для соединений, простаивавших дольше N секунд
+mailPoolMaxIdle = get_env_int("mailPoolMaxIdle", 300)  # закрывать соединения, простаивавшие дольше N секунд
+
 # URL приложения
 appBaseUrl = get_env_str("appBaseUrl", "http://localhost:8000")
 appBaseName = get_env_str("appBaseName", "TitanCore Framework")
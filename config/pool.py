@@ -0,0 +1,206 @@
+# config/pool.py
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.Services.MetricsService import Histogram
+from app.Services.TimingService import TimingService
+from .app import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    def __init__(self):
+        self.wait = Histogram(POOL_WAIT_BUCKETS)
+        # Время от checkout до checkin одного соединения
+        self.hold = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts = 0
+        self.disconnects = 0
+
+
+_engines: Dict[str, Any] = {}
+_stats: Dict[str, PoolStats] = {}
+
+# Суммарное удержание соединений всеми пулами за запрос (track_request/finish_request в get_async_db)
+_request_hold: ContextVar[Optional[List[float]]] = ContextVar("db_request_hold", default=None)
+request_hold = Histogram(POOL_WAIT_BUCKETS)
+
+
+def get_pool_stats(name: str) -> PoolStats:
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = PoolStats()
+    return stats
+
+
+class _InstrumentedPoolMixin:
+    """Замер ожидания checkout и подсчет таймаутов. Статистика хранится по logging_name пула,
+    поэтому переживает pool.recreate() после dispose/инвалидации"""
+
+    def _do_get(self):
+        stats = get_pool_stats(self._orig_logging_name)
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            logger.warning(f"Database pool '{self._orig_logging_name}' checkout timeout: {self.status()}")
+            raise
+        stats.wait.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(name: str, is_async: bool = False) -> Dict[str, Any]:
+    """Параметры пула для create_engine / create_async_engine из настроек database_pool_*"""
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        # optimistic: без ping на каждый checkout; разорванные соединения отбрасываются
+        # по ошибке disconnect (вместе со всем пулом) и по pool_recycle
+        "pool_pre_ping": settings.database_pool_pre_ping == "always",
+    }
+
+
+def register(name: str, engine) -> None:
+    _engines[name] = engine
+    get_pool_stats(name)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "handle_error", _on_handle_error(name))
+    event.listen(sync_engine, "checkout", _on_checkout)
+    event.listen(sync_engine, "checkin", _on_checkin(name))
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Контекст выполнения создается на каждый statement, поэтому время старта хранится в нем
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Импорт при вызове: QueryMonitor читает config.app, а пакет config импортирует этот модуль
+    from app.Services.QueryMonitor import QueryMonitor
+
+    elapsed = time.perf_counter() - context._query_started
+    TimingService.add("db", elapsed)
+    QueryMonitor.record(statement, parameters, elapsed, cursor.rowcount, executemany)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    connection_record.info["checkout_at"] = time.perf_counter()
+
+
+def _on_checkin(name: str):
+    def checkin(dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checkout_at", None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        get_pool_stats(name).hold.observe(held)
+        # checkin выполняется в контексте запроса, вернувшего соединение (для async - через greenlet того же task)
+        hold = _request_hold.get()
+        if hold is not None:
+            hold[0] += held
+    return checkin
+
+
+def track_request() -> Token:
+    """Начало учета удержания соединений текущим запросом"""
+    return _request_hold.set([0.0])
+
+
+def finish_request(token: Token) -> float:
+    """Конец учета: суммарное время удержания соединений запросом в секундах (0 - БД не понадобилась)"""
+    hold = _request_hold.get()
+    _request_hold.reset(token)
+    held = hold[0] if hold is not None else 0.0
+    request_hold.observe(held)
+    return held
+
+
+def _on_handle_error(name: str):
+    def handle_error(context) -> None:
+        if context.is_disconnect:
+            get_pool_stats(name).disconnects += 1
+            logger.warning(f"Database disconnect on '{name}', pool invalidated: {context.original_exception}")
+    return handle_error
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Снимок состояния всех зарегистрированных пулов"""
+    result = {}
+    for name, engine in _engines.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        stats = get_pool_stats(name)
+        result[name] = {
+            "timeouts": stats.timeouts,
+            "disconnects": stats.disconnects,
+            "wait_seconds": stats.wait.snapshot(),
+            "hold_seconds": stats.hold.snapshot(),
+        }
+        # Размеры есть только у QueuePool; NullPool/StaticPool (например, sqlite) их не ведут
+        if isinstance(pool, QueuePool):
+            result[name].update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            })
+    return result
+
+
+def request_hold_stats() -> Dict:
+    """Распределение суммарного удержания соединений на запрос через get_async_db"""
+    return request_hold.snapshot()
+
+
+async def warm_up() -> None:
+    """Открывает pool_size соединений в каждом пуле до первого запроса"""
+    for name, engine in _engines.items():
+        try:
+            if hasattr(engine, "sync_engine"):
+                await _warm_up_async(engine)
+            else:
+                await asyncio.to_thread(_warm_up_sync, engine)
+        except Exception as e:
+            # Недоступная при старте БД не должна мешать запуску приложения
+            logger.warning(f"Database pool '{name}' warm-up failed: {e}")
+
+
+async def _warm_up_async(engine) -> None:
+    connections = []
+    try:
+        for _ in range(settings.database_pool_size):
+            connections.append(await engine.connect())
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def _warm_up_sync(engine) -> None:
+    connections = []
+    try:
+        for _ in range(settings.database_pool_size):
+            connections.append(engine.raw_connection())
+    finally:
+        for connection in connections:
+            connection.close()
@@ -10,9 +10,30 @@ from app.Controllers.Auth.ForgotPasswordController import ForgotPasswordControll
 from app.Middleware.auth import auth_redirect
 from app.Middleware.not_auth import not_auth_redirect
 from app.Controllers.Test.TestController import TestController
+from app.Controllers.Health.HealthController import HealthController
+from app.Controllers.Metrics.MetricsController import MetricsController
+from app.Services.MetricsRegistry import MetricsRegistry
+from app.Middleware.rate_limit import RateLimit, client_ip
+from config.app import settings
 
 router = APIRouter()
 
+# Ограничения частоты запросов: проверяются RateLimitMiddleware до чтения тела и до Depends(...)
+rate_limits = [
+    RateLimit("POST", "/auth/login", limit=5, window_seconds=300, key=client_ip, name="login"),
+    RateLimit("POST", "/password/email", limit=5, window_seconds=900, key=client_ip, name="password_email"),
+    RateLimit("POST", "/password/change", limit=5, window_seconds=900, key=client_ip, name="password_change"),
+]
+
+# Пути без состояния: middleware сессий и rate limit к ним не применяются,
+# поэтому обработчики этих путей не должны обращаться к request.session
+stateless_paths = ["/static", "/health", "/metrics"]
+
+router.get("/health", tags=["health"])(HealthController.health)
+# В production без metrics_token маршрут не регистрируется
+if MetricsRegistry.enabled():
+    router.get("/metrics", tags=["metrics"], include_in_schema=False)(MetricsController.metrics)
+
 
 # Маршруты (перенаправляем авторизованных на /main)
 auth_router = APIRouter(dependencies=[Depends(auth_redirect)])
@@ -0,0 +1,94 @@
+# config/routing.py
+
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+# Ключ в Session.info: после записи или commit все запросы сессии идут на primary
+PIN_PRIMARY = "pin_primary"
+
+
+class ReplicaSet:
+    """Round-robin по репликам; упавшая реплика исключается на retry_after секунд"""
+
+    def __init__(self, engines: List, retry_after: float = 30.0):
+        self.engines = list(engines)
+        self.retry_after = retry_after
+        self._counter = itertools.count()
+        self._down_until: Dict[int, float] = {}
+        for index, engine in enumerate(self.engines):
+            event.listen(getattr(engine, "sync_engine", engine), "handle_error", self._on_handle_error(index))
+
+    def choose(self):
+        """Следующая доступная реплика (sync Engine) или None, если все исключены"""
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._down_until.get(index, 0.0) <= now:
+                engine = self.engines[index]
+                return getattr(engine, "sync_engine", engine)
+        return None
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_after
+
+    def _on_handle_error(self, index: int):
+        def handle_error(context) -> None:
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+                self.mark_down(index)
+                logger.warning(
+                    f"Database replica {index} ejected for {self.retry_after}s: {context.original_exception}"
+                )
+        return handle_error
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """Чистые SELECT идут на реплики, запись, flush и SELECT ... FOR UPDATE — на primary (bind)"""
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.replicas is not None
+            and not self.info.get(PIN_PRIMARY)
+            and not self._flushing
+            and _is_read(clause)
+        ):
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def pin_primary(session) -> None:
+    """Принудительно направить оставшиеся запросы сессии (Session или AsyncSession) на primary"""
+    getattr(session, "sync_session", session).info[PIN_PRIMARY] = True
+
+
+# read-your-writes: сессия живет один запрос, поэтому закрепление действует до конца запроса
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context) -> None:
+    session.info[PIN_PRIMARY] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_after_commit(session) -> None:
+    session.info[PIN_PRIMARY] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_after_write(orm_execute_state) -> None:
+    if not _is_read(orm_execute_state.statement):
+        orm_execute_state.session.info[PIN_PRIMARY] = True
@@ -1,6 +1,55 @@
 # config/templates.py
 
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+from typing import Optional
 import os
+from config.app import settings
+from app.Services.AssetService import AssetService
+from app.Services.TimingService import TimingService
 
-templates = Jinja2Templates(directory=os.path.join("app", "Views"))
+VIEWS_DIR = os.path.join("app", "Views")
+
+# Скомпилированные шаблоны, общие для всех воркеров (craft templates:compile заполняет кеш при деплое)
+TEMPLATES_CACHE_DIR = os.path.join("storage", "framework", "templates")
+os.makedirs(TEMPLATES_CACHE_DIR, exist_ok=True)
+
+
+class TimedTemplate(Template):
+    """Рендер шаблона попадает в фазу template замера запроса (Server-Timing)"""
+
+    def render(self, *args, **kwargs) -> str:
+        with TimingService.measure("template"):
+            return super().render(*args, **kwargs)
+
+    async def render_async(self, *args, **kwargs) -> str:
+        with TimingService.measure("template"):
+            return await super().render_async(*args, **kwargs)
+
+
+def create_environment(cache_dir: Optional[str] = TEMPLATES_CACHE_DIR, enable_async: bool = False) -> Environment:
+    """Окружение Jinja для app/Views; cache_dir=None - без кеша байткода"""
+    bytecode_cache = None
+    if cache_dir:
+        # Ключ кеша не учитывает enable_async, а код синхронного и асинхронного шаблона разный
+        pattern = "__jinja2_async_%s.cache" if enable_async else "__jinja2_%s.cache"
+        bytecode_cache = FileSystemBytecodeCache(cache_dir, pattern)
+
+    env = Environment(
+        loader=FileSystemLoader(VIEWS_DIR),
+        autoescape=True,
+        enable_async=enable_async,
+        bytecode_cache=bytecode_cache,
+        # В production шаблоны меняются только с деплоем: без проверки mtime на каждый рендер
+        auto_reload=settings.environment != "production"
+    )
+    # {{ asset_url('css/styles.css') }} -> /static/build/css/styles.<hash>.css после craft assets:build
+    env.globals["asset_url"] = AssetService.url
+    env.template_class = TimedTemplate
+    return env
+
+
+templates = Jinja2Templates(env=create_environment())
+
+# Асинхронное окружение для StreamingTemplateResponse (generate_async)
+streaming_templates = Jinja2Templates(env=create_environment(enable_async=True))
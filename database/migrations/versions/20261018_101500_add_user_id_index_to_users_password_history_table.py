@@ -0,0 +1,22 @@
+"""
+Add (user_id, id) index to users_password_history table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261018_101500'
+down_revision = '20250826_160506'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Последние N паролей пользователя: WHERE user_id = ? ORDER BY id DESC LIMIT N
+    op.create_index(
+        'users_password_history_user_id_id_index',
+        'users_password_history',
+        ['user_id', 'id']
+    )
+
+def downgrade():
+    op.drop_index('users_password_history_user_id_id_index', table_name='users_password_history')
@@ -0,0 +1,25 @@
+"""
+Create sessions table
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261018_120000'
+down_revision = '20261018_101500'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'sessions',
+        sa.Column('id', sa.String(length=64), primary_key=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('last_activity', sa.BigInteger(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False)
+    )
+    op.create_index('sessions_last_activity_index', 'sessions', ['last_activity'])
+
+def downgrade():
+    op.drop_index('sessions_last_activity_index', table_name='sessions')
+    op.drop_table('sessions')